@@ -0,0 +1,268 @@
+"""
+---------------------------------------------------------------------------
+ catalogQAQC.py definitions to build per tile QA/QC summaries and a project
+   first return density raster in process, replacing per tile FUSION Catalog runs.
+   Results are cached in pFrastQQ keyed by file size and modification time,
+   so only new or changed tiles are rescanned.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Known limitations: python 3
+   callers on Windows must run CatalogQAQC under if __name__ == '__main__':
+---------------------------------------------------------------------------
+"""
+import os
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import LiDAR.lasUtility as lasU
+import LiDAR.rasterUtility as rastU
+
+# defaults, cell size matches Catalog /firstdensity:900
+fltDefaultCellSize = 30.0
+fltDefaultOutlierK = 3.0
+fltZBinSize = 0.5
+intMaxZBins = 200000
+
+strCacheName = 'qaqc_cache.json'
+strGridDir = 'qaqc_grids'
+strSummaryName = 'qaqc_summary.csv'
+# bump when cached grids change meaning, cache entries of other versions are rescanned
+intCacheVersion = 2
+lstSummaryFields = ['path', 'points', 'points_read', 'r1', 'r2', 'r3', 'r4', 'r5',
+                    'xmin', 'ymin', 'xmax', 'ymax', 'overrun', 'mismatch',
+                    'zmin', 'zmax', 'zlow', 'zhigh', 'outliers_low', 'outliers_high',
+                    'first_density']
+
+def _GridExtent(lstExt, fltCellSize):
+    """ Return [MinX, MinY, MaxX, MaxY] snapped outward to multiples of fltCellSize. """
+    return [math.floor(lstExt[0] / fltCellSize) * fltCellSize,
+            math.floor(lstExt[1] / fltCellSize) * fltCellSize,
+            math.ceil(lstExt[2] / fltCellSize) * fltCellSize,
+            math.ceil(lstExt[3] / fltCellSize) * fltCellSize]
+
+def _ZFences(arrHist, fltZMin, fltBin, fltK):
+    """ Return Tukey fences (low, high) from a z histogram. """
+    arrCum = np.cumsum(arrHist)
+    intN = arrCum[-1]
+    fltQ1 = fltZMin + np.searchsorted(arrCum, 0.25 * intN) * fltBin
+    fltQ3 = fltZMin + (np.searchsorted(arrCum, 0.75 * intN) + 1) * fltBin
+    fltIQR = fltQ3 - fltQ1
+    return fltQ1 - fltK * fltIQR, fltQ3 + fltK * fltIQR
+
+def ScanTile(strPathLAS, lstTileExt, fltCellSize, fltOutlierK, fltTolerance, strPathGrid):
+    """ Function ScanTile
+        args:
+            strPathLAS =   input LAS/LAZ file
+            lstTileExt =   tile extent from file name [MinX, MinY, MaxX, MaxY], or None
+            fltCellSize =  density grid cell size in map units
+            fltOutlierK =  IQR multiplier for z outlier fences
+            fltTolerance = allowed data overrun beyond tile extent, map units
+            strPathGrid =  output .npy first return count grid, only points within lstTileExt
+                             are counted so grids of neighboring tiles can be summed
+
+        returns summary dictionary, see lstSummaryFields.
+    """
+    oH = lasU.ReadHeader(strPathLAS)
+    dic = {'path': strPathLAS,
+           'points': oH.PointCount}
+    for i in range(5):
+        dic['r' + str(i + 1)] = oH.PointsByReturn[i]
+    dic['xmin'], dic['ymin'], dic['xmax'], dic['ymax'] = oH.Extent()
+    dic['zmin'], dic['zmax'] = oH.ZMin, oH.ZMax
+
+    # data overrun beyond the extent encoded in the tile name
+    if lstTileExt:
+        fltOverrun = max(lstTileExt[0] - oH.XMin, lstTileExt[1] - oH.YMin,
+                         oH.XMax - lstTileExt[2], oH.YMax - lstTileExt[3], 0.0)
+        lstGridExt = _GridExtent(lstTileExt, fltCellSize)
+    else:
+        fltOverrun = 0.0
+        lstGridExt = _GridExtent(oH.Extent(), fltCellSize)
+    dic['overrun'] = fltOverrun
+    dic['mismatch'] = fltOverrun > fltTolerance
+
+    intCols = max(int(round((lstGridExt[2] - lstGridExt[0]) / fltCellSize)), 1)
+    intRows = max(int(round((lstGridExt[3] - lstGridExt[1]) / fltCellSize)), 1)
+    arrCount = np.zeros(intRows * intCols, dtype = np.int64)
+
+    fltBin = max(fltZBinSize, (oH.ZMax - oH.ZMin) / intMaxZBins)
+    intBins = int((oH.ZMax - oH.ZMin) / fltBin) + 1
+    arrHist = np.zeros(intBins, dtype = np.int64)
+
+    intRead = 0
+    for arrPoints in lasU.ReadPoints(strPathLAS, oH = oH):
+        intRead += len(arrPoints)
+        x, y, z = lasU.ScaledXYZ(oH, arrPoints)
+        arrBin = np.clip(((z - oH.ZMin) / fltBin).astype(np.int64), 0, intBins - 1)
+        arrHist += np.bincount(arrBin, minlength = intBins)
+
+        arrRet = lasU.ReturnNumbers(oH, arrPoints)[0]
+        isFirst = arrRet <= 1
+        if lstTileExt:
+            # buffer points belong to the neighboring tile
+            isFirst &= ((x >= lstTileExt[0]) & (x < lstTileExt[2]) & (y >= lstTileExt[1]) & (y < lstTileExt[3]))
+        arrC = np.floor((x[isFirst] - lstGridExt[0]) / fltCellSize).astype(np.int64)
+        arrR = np.floor((lstGridExt[3] - y[isFirst]) / fltCellSize).astype(np.int64)
+        isIn = (arrC >= 0) & (arrC < intCols) & (arrR >= 0) & (arrR < intRows)
+        arrCount += np.bincount(arrR[isIn] * intCols + arrC[isIn], minlength = intRows * intCols)
+    dic['points_read'] = intRead
+
+    if intRead:
+        fltLow, fltHigh = _ZFences(arrHist, oH.ZMin, fltBin, fltOutlierK)
+        arrEdges = oH.ZMin + np.arange(intBins) * fltBin
+        dic['zlow'], dic['zhigh'] = float(fltLow), float(fltHigh)
+        dic['outliers_low'] = int(arrHist[arrEdges + fltBin <= fltLow].sum())
+        dic['outliers_high'] = int(arrHist[arrEdges >= fltHigh].sum())
+    else:
+        dic['zlow'] = dic['zhigh'] = None
+        dic['outliers_low'] = dic['outliers_high'] = 0
+
+    arrCount = arrCount.reshape(intRows, intCols)
+    np.save(strPathGrid, arrCount.astype(np.int32))
+    dic['first_density'] = float(arrCount.mean() / (fltCellSize * fltCellSize))
+    dic['grid'] = strPathGrid
+    dic['grid_core'] = bool(lstTileExt)
+    dic['grid_extent'] = lstGridExt
+    return dic
+
+def _LoadCache(strPathCache):
+    """ Return cache dictionary, empty if not present or unreadable. """
+    if not os.path.exists(strPathCache):
+        return {}
+    try:
+        with open(strPathCache) as txt:
+            return json.load(txt)
+    except ValueError:
+        print('WARNING: unreadable QA/QC cache, rescanning all tiles: ' + strPathCache)
+        return {}
+
+def _SaveCache(strPathCache, dicCache):
+    """ Write cache dictionary via temporary file so an interrupted run can't corrupt it. """
+    strPathTemp = strPathCache + '.tmp'
+    with open(strPathTemp, 'w') as txt:
+        json.dump(dicCache, txt)
+    os.replace(strPathTemp, strPathCache)
+
+def _TileExtent(oP, strPathLAS):
+    """ Return tile extent encoded in file name, None if the name does not follow convention. """
+    try:
+        oT = oP.getTileObject(strPathLAS)
+    except (ValueError, IndexError):
+        return None
+    return [oT.XMin, oT.YMin, oT.XMax, oT.YMax]
+
+def WriteSummary(strPathCSV, lstSummary):
+    """ Write per tile summaries to csv. """
+    with open(strPathCSV, 'w') as txt:
+        txt.write(','.join(lstSummaryFields) + '\n')
+        for dic in lstSummary:
+            txt.write(','.join([str(dic[k]) for k in lstSummaryFields]) + '\n')
+
+def MosaicDensity(strPathASC, lstSummary, fltCellSize):
+    """ Function MosaicDensity
+        Mosaic cached per tile first return count grids to a project ESRI ASCII grid of density.
+        Counts of tiles with a parseable name are summed, so cells split by a tile seam are whole;
+        other tiles may include buffer points, overlapping cells take the maximum density.
+    """
+    lstSummary = [dic for dic in lstSummary if dic.get('grid')]
+    if not lstSummary:
+        return
+    fltXMin = min([dic['grid_extent'][0] for dic in lstSummary])
+    fltYMin = min([dic['grid_extent'][1] for dic in lstSummary])
+    fltXMax = max([dic['grid_extent'][2] for dic in lstSummary])
+    fltYMax = max([dic['grid_extent'][3] for dic in lstSummary])
+    intCols = int(round((fltXMax - fltXMin) / fltCellSize))
+    intRows = int(round((fltYMax - fltYMin) / fltCellSize))
+
+    fltArea = fltCellSize * fltCellSize
+    arrCount = np.zeros((intRows, intCols), dtype = np.int64)
+    isCovered = np.zeros((intRows, intCols), dtype = bool)
+    arrMax = np.full((intRows, intCols), np.nan, dtype = np.float32)
+    for dic in lstSummary:
+        arr = np.load(dic['grid'])
+        intC = int(round((dic['grid_extent'][0] - fltXMin) / fltCellSize))
+        intR = int(round((fltYMax - dic['grid_extent'][3]) / fltCellSize))
+        tupWin = (slice(intR, intR + arr.shape[0]), slice(intC, intC + arr.shape[1]))
+        if dic['grid_core']:
+            arrCount[tupWin] += arr
+            isCovered[tupWin] = True
+        else:
+            arrMax[tupWin] = np.fmax(arrMax[tupWin], arr / fltArea)
+    arrProj = np.where(isCovered, arrCount / fltArea, np.nan).astype(np.float32)
+    arrProj = np.fmax(arrProj, arrMax)
+    rastU.WriteASCII(strPathASC, arrProj, fltXMin, fltYMin, fltCellSize)
+
+def CatalogQAQC(oP, lstPathLAS, fltCellSize = None, fltOutlierK = None, intWorkers = None, boolRaster = True):
+    """ Function CatalogQAQC
+        args:
+            oP =          LibraryPaths object
+            lstPathLAS =  list of LAS/LAZ files, see LiDARUtility.GetLASlist
+            fltCellSize = OPTIONAL, density cell size, default = fltDefaultCellSize
+            fltOutlierK = OPTIONAL, IQR multiplier for z outliers, default = fltDefaultOutlierK
+            intWorkers =  OPTIONAL, number of scan processes, default = cpu count
+            boolRaster =  OPTIONAL, write project density raster, default = True
+
+        Tiles whose size and modification time match the cache are not rescanned.
+        Writes qaqc_summary.csv and <project>_first_density.asc to pFrastQQ.
+        returns list of summary dictionaries in lstPathLAS order.
+    """
+    if fltCellSize is None:
+        fltCellSize = fltDefaultCellSize
+    if fltOutlierK is None:
+        fltOutlierK = fltDefaultOutlierK
+
+    strPathGrids = oP.pFrastQQ + strGridDir + os.sep
+    os.makedirs(strPathGrids, exist_ok = True)
+    strPathCache = oP.pFrastQQ + strCacheName
+    dicCache = _LoadCache(strPathCache)
+
+    # cache entries are valid only for the same file state and scan parameters
+    dicStat = {}
+    lstScan = []
+    for strPathLAS in lstPathLAS:
+        strPathLAS = strPathLAS.strip()
+        st = os.stat(strPathLAS)
+        dicStat[strPathLAS] = [st.st_size, st.st_mtime, fltCellSize, fltOutlierK, intCacheVersion]
+        dic = dicCache.get(strPathLAS)
+        if dic is None or dic['key'] != dicStat[strPathLAS] or not os.path.exists(dic['grid']):
+            lstScan.append(strPathLAS)
+    print(str(len(lstScan)) + ' of ' + str(len(lstPathLAS)) + ' tile(s) new or changed.')
+
+    if lstScan:
+        with ProcessPoolExecutor(intWorkers) as ex:
+            dicFut = {}
+            for strPathLAS in lstScan:
+                strPathGrid = strPathGrids + os.path.splitext(os.path.basename(strPathLAS))[0] + '.npy'
+                fut = ex.submit(ScanTile, strPathLAS, _TileExtent(oP, strPathLAS), fltCellSize,
+                                fltOutlierK, oP.intTileBuffer, strPathGrid)
+                dicFut[fut] = strPathLAS
+            for i, fut in enumerate(dicFut):
+                strPathLAS = dicFut[fut]
+                try:
+                    dic = fut.result()
+                except Exception as e:
+                    print('ERROR scanning ' + strPathLAS + ': ' + str(e))
+                    dicCache.pop(strPathLAS, None)
+                    continue
+                dic['key'] = dicStat[strPathLAS]
+                dicCache[strPathLAS] = dic
+                if not (i + 1) % 100:
+                    _SaveCache(strPathCache, dicCache)
+        _SaveCache(strPathCache, dicCache)
+
+    lstSummary = [dicCache[s.strip()] for s in lstPathLAS if s.strip() in dicCache]
+    WriteSummary(oP.pFrastQQ + strSummaryName, lstSummary)
+
+    lstMismatch = [dic['path'] for dic in lstSummary if dic['mismatch'] or dic['points'] != dic['points_read']]
+    if lstMismatch:
+        print('WARNING: ' + str(len(lstMismatch)) + ' tile(s) with extent or point count mismatch, see ' + strSummaryName)
+    if boolRaster:
+        MosaicDensity(oP.pFrastQQ + oP.name + '_first_density.asc', lstSummary, fltCellSize)
+
+    return lstSummary
@@ -0,0 +1,212 @@
+"""
+---------------------------------------------------------------------------
+ commandRunner.py definitions to execute command strings built by pyFusion
+   and pyLAStools in parallel with memory aware admission control.
+   Peak memory of each job is estimated from tool and point count, jobs are
+   admitted only while the sum of estimates of running jobs fits a budget,
+   lighter jobs backfill behind a heavy job that does not fit.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Measured peak RSS (requires psutil) updates the per tool memory model,
+   without psutil the seed model is used as is.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import json
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import LiDAR.jobPlanner as planner
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# seed memory model, tool: [base MB, bytes per point]
+dicDefaultMemory = {'CanopyModel': [100.0, 24.0],
+                    'Cover': [100.0, 24.0],
+                    'GridMetrics': [150.0, 48.0],
+                    'GridSurfaceCreate': [150.0, 40.0],
+                    'GroundFilter': [150.0, 80.0],
+                    'TreeSeg': [200.0, 48.0],
+                    'lasground': [100.0, 40.0],
+                    'lasground_new': [200.0, 64.0],
+                    'las2dem': [100.0, 32.0]}
+lstDefaultMemory = [100.0, 32.0]
+# multiplier applied to estimates
+fltDefaultSafety = 1.2
+# samples with fewer points are dominated by base memory and do not update the slope
+intMinSamplePoints = 1000000
+strMemoryName = 'tool_memory.json'
+fltSampleSeconds = 0.5
+
+class MemoryModel:
+    """ Class MemoryModel, per tool linear peak memory model: MB = base + bytes per point * points.
+        Learned from measured peak RSS, seeded from dicDefaultMemory.
+    """
+    def __init__(self, strPathModel = None, fltSafety = None):
+        """ init """
+        self.path = strPathModel
+        self.safety = fltDefaultSafety if fltSafety is None else fltSafety
+        self.tools = dict([(k, {'base': v[0], 'bpp': v[1], 'n': 0}) for k, v in dicDefaultMemory.items()])
+        if strPathModel and os.path.exists(strPathModel):
+            with open(strPathModel) as txt:
+                self.tools.update(json.load(txt))
+
+    def Estimate(self, strTool, intPoints):
+        """ Return estimated peak MB of one command. """
+        dic = self.tools.get(strTool, {'base': lstDefaultMemory[0], 'bpp': lstDefaultMemory[1]})
+        return (dic['base'] + dic['bpp'] * intPoints / 1048576.0) * self.safety
+
+    def Record(self, strTool, intPoints, fltPeakMB):
+        """ Update tool model with one measured peak; increases are adopted faster than decreases.
+            Small inputs and peaks at or below base memory say nothing about the slope and are ignored.
+        """
+        if not intPoints or not fltPeakMB or intPoints < intMinSamplePoints:
+            return
+        dic = self.tools.setdefault(strTool, {'base': lstDefaultMemory[0], 'bpp': lstDefaultMemory[1], 'n': 0})
+        if fltPeakMB <= dic['base']:
+            return
+        fltBPP = (fltPeakMB - dic['base']) * 1048576.0 / intPoints
+        fltAlpha = 0.5 if fltBPP > dic['bpp'] else 0.1
+        dic['bpp'] = (1 - fltAlpha) * dic['bpp'] + fltAlpha * fltBPP
+        dic['n'] += 1
+
+    def Save(self):
+        """ Write model to strPathModel. """
+        if not self.path:
+            return
+        strPathTemp = self.path + '.tmp'
+        with open(strPathTemp, 'w') as txt:
+            json.dump(self.tools, txt, indent = 1)
+        os.replace(strPathTemp, self.path)
+
+def MemoryPath(oP):
+    """ Return project memory model file. """
+    return oP.p + strMemoryName
+
+def _TreeRSS(proc):
+    """ Return MB resident of a process and its children. """
+    try:
+        lstProc = [proc] + proc.children(recursive = True)
+    except psutil.Error:
+        return 0.0
+    fltMB = 0.0
+    for p in lstProc:
+        try:
+            fltMB += p.memory_info().rss / 1048576.0
+        except psutil.Error:
+            pass
+    return fltMB
+
+def RunCommand(strCMD):
+    """ Function RunCommand
+        Run one command string, sampling peak resident memory if psutil is available.
+        returns return code, seconds, peak MB (None if not measured)
+    """
+    fltStart = time.time()
+    proc = subprocess.Popen(strCMD, shell = True)
+    if psutil is None:
+        intRet = proc.wait()
+        return intRet, time.time() - fltStart, None
+
+    fltPeak = 0.0
+    try:
+        pproc = psutil.Process(proc.pid)
+    except psutil.Error:
+        pproc = None
+    while True:
+        try:
+            intRet = proc.wait(fltSampleSeconds)
+            break
+        except subprocess.TimeoutExpired:
+            if pproc is not None:
+                fltPeak = max(fltPeak, _TreeRSS(pproc))
+    return intRet, time.time() - fltStart, fltPeak or None
+
+def RunCommands(oP, lstJobs, intWorkers, fltBudgetMB, oModel = None, strPathHistory = None, oCommitter = None):
+    """ Function RunCommands
+        args:
+            oP =             LibraryPaths object, for the default memory model and throughput history
+            lstJobs =        list of (command string, input point count), in priority order,
+                               e.g. longest first from jobPlanner.PlanJobs
+                               optionally (command string, input point count, [(local output, destination), ...])
+            intWorkers =     maximum commands running at once
+            fltBudgetMB =    memory budget for all running commands, MB
+            oModel =         OPTIONAL, MemoryModel, default = MemoryModel(MemoryPath(oP)), saved when done
+            strPathHistory = OPTIONAL, throughput history to update, default = jobPlanner.HistoryPath(oP)
+            oCommitter =     OPTIONAL, outputCommit.OutputCommitter, outputs of successful commands
+                               are queued for commit, those of failed commands discarded
+
+        A job is admitted when its estimate fits the remaining budget; a job larger than
+        the whole budget runs alone. Lighter jobs may pass a job that does not fit,
+        at most 2 * intWorkers times before the passed job is waited for.
+        returns list of (command string, return code, seconds, peak MB) in completion order.
+    """
+    if oModel is None:
+        oModel = MemoryModel(MemoryPath(oP))
+    if strPathHistory is None:
+        strPathHistory = planner.HistoryPath(oP)
+    intMaxBypass = 2 * intWorkers
+
+    lstPending = []
+    for tupJob in lstJobs:
+        strCMD, intPoints = tupJob[:2]
+        lstOutputs = tupJob[2] if len(tupJob) > 2 else []
+        lstPending.append((strCMD, intPoints, planner.ToolName(strCMD), lstOutputs))
+    dicRunning = {}
+    fltInUse = 0.0
+    intBypass = 0
+    lstResults = []
+    with ThreadPoolExecutor(intWorkers) as ex:
+        while lstPending or dicRunning:
+            # admit in priority order, backfilling behind a job that does not fit
+            i = 0
+            while i < len(lstPending) and len(dicRunning) < intWorkers:
+                strCMD, intPoints, strTool, lstOutputs = lstPending[i]
+                fltEst = oModel.Estimate(strTool, intPoints)
+                if fltInUse + fltEst <= fltBudgetMB or not dicRunning:
+                    fut = ex.submit(RunCommand, strCMD)
+                    dicRunning[fut] = (strCMD, intPoints, strTool, lstOutputs, fltEst)
+                    fltInUse += fltEst
+                    lstPending.pop(i)
+                    if i == 0:
+                        intBypass = 0
+                    else:
+                        intBypass += 1
+                elif i == 0 and intBypass >= intMaxBypass:
+                    break
+                else:
+                    i += 1
+
+            setDone = wait(dicRunning, return_when = FIRST_COMPLETED)[0]
+            for fut in setDone:
+                strCMD, intPoints, strTool, lstOutputs, fltEst = dicRunning.pop(fut)
+                fltInUse -= fltEst
+                intRet, fltSec, fltPeak = fut.result()
+                lstResults.append((strCMD, intRet, fltSec, fltPeak))
+                if intRet:
+                    print('ERROR ' + str(intRet) + ': ' + strCMD)
+                    if oCommitter is not None:
+                        for strPathTemp, strPathFinal in lstOutputs:
+                            oCommitter.Discard(strPathTemp)
+                    continue
+                if oCommitter is not None:
+                    for strPathTemp, strPathFinal in lstOutputs:
+                        oCommitter.Commit(strPathTemp, strPathFinal)
+                if fltPeak:
+                    if fltPeak > fltEst:
+                        print('WARNING: {0} peak {1:.0f} MB exceeded estimate {2:.0f} MB'.format(strTool, fltPeak, fltEst))
+                    oModel.Record(strTool, intPoints, fltPeak)
+                if strPathHistory:
+                    planner.RecordThroughput(strPathHistory, strTool, intPoints, fltSec)
+    oModel.Save()
+    return lstResults
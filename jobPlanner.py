@@ -0,0 +1,170 @@
+"""
+---------------------------------------------------------------------------
+ jobPlanner.py definitions to plan (dry run) tile processing jobs.
+   Estimates the cost of each tile from LAS header point counts and
+   per tool throughput history, orders tiles longest first and assigns
+   them to workers, then reports predicted wall time and critical path.
+   Nothing is executed.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import ntpath
+import json
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+import LiDAR.lasUtility as lasU
+
+# default throughput, points per second, used until history is recorded
+dicDefaultThroughput = {'Catalog': 3000000.0,
+                        'CanopyModel': 1500000.0,
+                        'Cover': 1000000.0,
+                        'ClipData': 3000000.0,
+                        'GridMetrics': 400000.0,
+                        'GridSurfaceCreate': 1000000.0,
+                        'GroundFilter': 500000.0,
+                        'IntensityImage': 2000000.0,
+                        'TreeSeg': 300000.0,
+                        'lasground': 1000000.0,
+                        'lasground_new': 600000.0,
+                        'lasindex': 8000000.0,
+                        'las2las': 5000000.0,
+                        'las2dem': 2000000.0,
+                        'lasgrid': 3000000.0}
+fltDefaultPPS = 1000000.0
+# fixed seconds per command, process start up and file open
+fltDefaultOverhead = 2.0
+# commands shorter than this are mostly overhead, their throughput is not recorded
+fltMinSampleSeconds = 2 * fltDefaultOverhead
+# weight of newest observation in throughput history
+fltHistoryAlpha = 0.2
+strHistoryName = 'tool_throughput.json'
+
+def ToolName(strCMD):
+    """ Return tool name from a command string built by pyFusion or pyLAStools. """
+    strTool = ntpath.basename(strCMD.strip().split(' ')[0])
+    if strTool.lower().endswith('.exe'):
+        strTool = strTool[:-4]
+    return strTool
+
+def HistoryPath(oP):
+    """ Return project throughput history file. """
+    return oP.p + strHistoryName
+
+def LoadThroughput(strPathHistory = None):
+    """ Return dictionary of tool: points per second, history overriding defaults. """
+    dicPPS = dict(dicDefaultThroughput)
+    if strPathHistory and os.path.exists(strPathHistory):
+        with open(strPathHistory) as txt:
+            for k, v in json.load(txt).items():
+                dicPPS[k] = v['pps']
+    return dicPPS
+
+def RecordThroughput(strPathHistory, strTool, intPoints, fltSeconds):
+    """ Update throughput history with one measured command, skipped if shorter than fltMinSampleSeconds. """
+    if not intPoints or fltSeconds < fltMinSampleSeconds:
+        return
+    dicHistory = {}
+    if os.path.exists(strPathHistory):
+        with open(strPathHistory) as txt:
+            dicHistory = json.load(txt)
+    fltPPS = intPoints / (fltSeconds - fltDefaultOverhead)
+    if strTool in dicHistory:
+        dic = dicHistory[strTool]
+        dic['pps'] = (1 - fltHistoryAlpha) * dic['pps'] + fltHistoryAlpha * fltPPS
+        dic['n'] += 1
+    else:
+        dicHistory[strTool] = {'pps': fltPPS, 'n': 1}
+    strPathTemp = strPathHistory + '.tmp'
+    with open(strPathTemp, 'w') as txt:
+        json.dump(dicHistory, txt, indent = 1)
+    os.replace(strPathTemp, strPathHistory)
+
+def EstimateSeconds(strTool, intPoints, dicPPS):
+    """ Return estimated seconds for one command. """
+    return fltDefaultOverhead + intPoints / dicPPS.get(strTool, fltDefaultPPS)
+
+def PointCounts(lstPathLAS, intThreads = 16):
+    """ Return dictionary of path: header point count, headers read in parallel. """
+    lstPathLAS = [s.strip() for s in lstPathLAS]
+    with ThreadPoolExecutor(intThreads) as ex:
+        lstH = list(ex.map(lasU.ReadHeader, lstPathLAS))
+    return dict([(s, oH.PointCount) for s, oH in zip(lstPathLAS, lstH)])
+
+def _Schedule(lstJobs, intWorkers):
+    """ Assign (seconds, path) jobs in list order to the least loaded worker.
+        returns makespan and list of job lists per worker.
+    """
+    heap = [(0.0, i) for i in range(intWorkers)]
+    lstWorkers = [[] for i in range(intWorkers)]
+    for fltSec, strPath in lstJobs:
+        fltLoad, i = heapq.heappop(heap)
+        lstWorkers[i].append(strPath)
+        heapq.heappush(heap, (fltLoad + fltSec, i))
+    return max([h[0] for h in heap]), lstWorkers
+
+def PlanJobs(oP, lstPathLAS, lstStages, intWorkers, dicPPS = None, boolPrint = True):
+    """ Function PlanJobs
+        args:
+            oP =         LibraryPaths object, throughput history is read from HistoryPath(oP)
+            lstPathLAS = list of LAS/LAZ tiles
+            lstStages =  list of tool names run in sequence on each tile, e.g. ['lasground_new', 'CanopyModel']
+            intWorkers = number of parallel workers
+            dicPPS =     OPTIONAL, tool throughput, default = LoadThroughput(HistoryPath(oP))
+            boolPrint =  OPTIONAL, print plan report, default = True
+
+        Each tile's stages are a chain, tiles are scheduled longest first (LPT).
+        returns dictionary:
+            order =    tiles, longest first
+            workers =  tiles assigned to each worker
+            seconds =  dictionary of path: estimated seconds
+            wall =     predicted wall time, seconds
+            critical = longest tile chain (path, seconds)
+    """
+    if dicPPS is None:
+        dicPPS = LoadThroughput(HistoryPath(oP))
+    dicPoints = PointCounts(lstPathLAS)
+
+    dicSec = {}
+    dicStageSec = dict([(s, 0.0) for s in lstStages])
+    for strPath, intPoints in dicPoints.items():
+        dicSec[strPath] = 0.0
+        for strTool in lstStages:
+            fltSec = EstimateSeconds(strTool, intPoints, dicPPS)
+            dicSec[strPath] += fltSec
+            dicStageSec[strTool] += fltSec
+
+    lstJobs = [(dicSec[s], s) for s in dicPoints]
+    fltListWall = _Schedule(lstJobs, intWorkers)[0]
+    lstJobs.sort(key = lambda t: -t[0])
+    fltWall, lstWorkers = _Schedule(lstJobs, intWorkers)
+
+    dicPlan = {'order': [s for f, s in lstJobs],
+               'workers': lstWorkers,
+               'seconds': dicSec,
+               'wall': fltWall,
+               'critical': (lstJobs[0][1], lstJobs[0][0]) if lstJobs else (None, 0.0)}
+
+    if boolPrint:
+        fltTotal = sum(dicSec.values())
+        print('Plan: ' + str(len(lstJobs)) + ' tile(s), ' + str(sum(dicPoints.values())) + ' points, '
+              + str(intWorkers) + ' worker(s)')
+        for strTool in lstStages:
+            print('\t{0:<20} {1:>12.0f} s cpu'.format(strTool, dicStageSec[strTool]))
+        print('Predicted wall time: {0:.0f} s ({1:.2f} h), list order: {2:.0f} s'.format(fltWall, fltWall / 3600, fltListWall))
+        print('Lower bound: {0:.0f} s, worker utilization: {1:.0%}'.format(
+            max(fltTotal / intWorkers, dicPlan['critical'][1]), fltTotal / (fltWall * intWorkers) if fltWall else 0))
+        strPath, fltSec = dicPlan['critical']
+        if strPath:
+            print('Critical path: {0} ({1} points) {2:.0f} s'.format(strPath, dicPoints[strPath], fltSec))
+            for strTool in lstStages:
+                print('\t{0:<20} {1:>12.0f} s'.format(strTool, EstimateSeconds(strTool, dicPoints[strPath], dicPPS)))
+
+    return dicPlan
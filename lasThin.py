@@ -0,0 +1,179 @@
+"""
+---------------------------------------------------------------------------
+ lasThin.py definitions to thin (decimate) LAS/LAZ tiles in process for
+   lightweight derivatives (intensity images, quick look products).
+   Points are read in chunks, thinned tiles are written as LAS to a local
+   cache with a manifest so repeated runs reuse them.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Modes:
+   random =   keep a random fraction of points, fltParam = fraction (0-1]
+   lowest =   keep the lowest point per cell, fltParam = cell size
+   highest =  keep the highest point per cell, fltParam = cell size
+   first =    keep one first return per cell, fltParam = cell size
+
+ Known limitations: python 3
+   callers on Windows must run ThinTiles under if __name__ == '__main__':
+---------------------------------------------------------------------------
+"""
+import os
+import math
+import json
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import LiDAR.lasUtility as lasU
+
+lstMODES = ['random', 'lowest', 'highest', 'first']
+strManifestName = 'thin_manifest.json'
+
+def _GridOrigin(oH, fltCellSize):
+    """ Return grid origin x, y snapped to a multiple of the cell size, so cells line up between tiles. """
+    return math.floor(oH.XMin / fltCellSize) * fltCellSize, math.floor(oH.YMin / fltCellSize) * fltCellSize
+
+def _CellIndex(oH, arrPoints, fltCellSize, fltX0, fltY0, intCols):
+    """ Return grid cell index of each point, grid origin at fltX0, fltY0. """
+    x, y, z = lasU.ScaledXYZ(oH, arrPoints)
+    arrC = np.floor((x - fltX0) / fltCellSize).astype(np.int64)
+    arrR = np.floor((y - fltY0) / fltCellSize).astype(np.int64)
+    return arrR * intCols + arrC, z
+
+def _SelectCells(strPathLAS, oH, strMode, fltCellSize):
+    """ Return sorted indices of points kept per cell (first pass). """
+    fltX0, fltY0 = _GridOrigin(oH, fltCellSize)
+    intCols = int((oH.XMax - fltX0) / fltCellSize) + 1
+    intRows = int((oH.YMax - fltY0) / fltCellSize) + 1
+    arrBestIdx = np.full(intRows * intCols, -1, dtype = np.int64)
+    arrBestZ = np.zeros(intRows * intCols)
+
+    intStart = 0
+    for arrPoints in lasU.ReadPoints(strPathLAS, oH = oH):
+        arrCell, z = _CellIndex(oH, arrPoints, fltCellSize, fltX0, fltY0, intCols)
+        arrCell = np.clip(arrCell, 0, intRows * intCols - 1)
+        arrIdx = np.arange(intStart, intStart + len(arrPoints))
+        intStart += len(arrPoints)
+
+        if strMode == 'first':
+            isFirst = lasU.ReturnNumbers(oH, arrPoints)[0] <= 1
+            arrCell, arrIdx = arrCell[isFirst], arrIdx[isFirst]
+            arrU, arrI = np.unique(arrCell, return_index = True)
+            isNew = arrBestIdx[arrU] < 0
+            arrBestIdx[arrU[isNew]] = arrIdx[arrI[isNew]]
+            continue
+
+        # best point of each cell within the chunk, then against earlier chunks
+        arrKey = z if strMode == 'lowest' else -z
+        arrOrder = np.lexsort((arrKey, arrCell))
+        arrU, arrI = np.unique(arrCell[arrOrder], return_index = True)
+        arrSel = arrOrder[arrI]
+        arrZ = z[arrSel]
+        if strMode == 'lowest':
+            isBetter = (arrBestIdx[arrU] < 0) | (arrZ < arrBestZ[arrU])
+        else:
+            isBetter = (arrBestIdx[arrU] < 0) | (arrZ > arrBestZ[arrU])
+        arrBestIdx[arrU[isBetter]] = arrIdx[arrSel[isBetter]]
+        arrBestZ[arrU[isBetter]] = arrZ[isBetter]
+
+    return np.sort(arrBestIdx[arrBestIdx >= 0])
+
+def _KeepIndices(strPathLAS, oH, arrKeep):
+    """ Generator of point chunks restricted to sorted global indices arrKeep (second pass). """
+    intStart = 0
+    for arrPoints in lasU.ReadPoints(strPathLAS, oH = oH):
+        intEnd = intStart + len(arrPoints)
+        i0, i1 = np.searchsorted(arrKeep, [intStart, intEnd])
+        yield arrPoints[arrKeep[i0:i1] - intStart]
+        intStart = intEnd
+
+def _RandomPoints(strPathLAS, oH, fltFraction):
+    """ Generator of randomly thinned point chunks, repeatable for a given file. """
+    rng = np.random.default_rng(zlib.crc32(os.path.basename(strPathLAS).encode()))
+    for arrPoints in lasU.ReadPoints(strPathLAS, oH = oH):
+        yield arrPoints[rng.random(len(arrPoints)) < fltFraction]
+
+def ThinTile(strPathLAS, strPathOut, strMode, fltParam):
+    """ Function ThinTile
+        args:
+            strPathLAS = input LAS/LAZ file
+            strPathOut = output LAS file
+            strMode =    thinning mode, see lstMODES
+            fltParam =   fraction for random, cell size otherwise
+
+        returns number of points written.
+    """
+    oH = lasU.ReadHeader(strPathLAS)
+    if strMode == 'random':
+        iterPoints = _RandomPoints(strPathLAS, oH, fltParam)
+    else:
+        iterPoints = _KeepIndices(strPathLAS, oH, _SelectCells(strPathLAS, oH, strMode, fltParam))
+
+    # write to a temporary name so an interrupted run never leaves a partial tile under the final name
+    strPathTemp = strPathOut + '.tmp'
+    intCount = lasU.WriteLAS(strPathTemp, oH, iterPoints)
+    os.replace(strPathTemp, strPathOut)
+    return intCount
+
+def ThinTiles(lstPathLAS, strMode, fltParam, strPathCache, intWorkers = None):
+    """ Function ThinTiles
+        args:
+            lstPathLAS =   list of LAS/LAZ files
+            strMode =      thinning mode, see lstMODES
+            fltParam =     fraction for random, cell size otherwise
+            strPathCache = local cache directory for thinned tiles and manifest
+            intWorkers =   OPTIONAL, number of processes, default = cpu count
+
+        Tiles are only thinned if not in the manifest for the same mode, parameter,
+        source size and modification time.
+        returns list of thinned LAS files in lstPathLAS order, tiles that failed are omitted.
+    """
+    if strMode not in lstMODES:
+        raise Exception('Invalid thinning mode: ' + strMode + ', must be in: ' + str(lstMODES))
+    os.makedirs(strPathCache, exist_ok = True)
+    strPathManifest = os.path.join(strPathCache, strManifestName)
+    dicManifest = {}
+    if os.path.exists(strPathManifest):
+        with open(strPathManifest) as txt:
+            dicManifest = json.load(txt)
+
+    strSuffix = '_' + strMode + str(fltParam).replace('.', 'p')
+    lstKeys = []
+    dicTodo = {}
+    for strPathLAS in lstPathLAS:
+        strPathLAS = strPathLAS.strip()
+        st = os.stat(strPathLAS)
+        strKey = strPathLAS + '|' + strSuffix
+        # source path hash keeps same named tiles from different folders apart
+        strHash = '{0:08x}'.format(zlib.crc32(os.path.normcase(os.path.abspath(strPathLAS)).encode()))
+        strPathOut = os.path.join(strPathCache, os.path.splitext(os.path.basename(strPathLAS))[0] + '_' + strHash
+                                  + strSuffix + '.las')
+        dic = dicManifest.get(strKey)
+        if dic is None or [dic['size'], dic['mtime']] != [st.st_size, st.st_mtime] or not os.path.exists(dic['out']):
+            dicTodo[strKey] = (strPathLAS, strPathOut, st.st_size, st.st_mtime)
+        lstKeys.append(strKey)
+    print(str(len(dicTodo)) + ' of ' + str(len(lstKeys)) + ' tile(s) to thin, ' + strMode + ' ' + str(fltParam))
+
+    if dicTodo:
+        with ProcessPoolExecutor(intWorkers) as ex:
+            dicFut = dict([(ex.submit(ThinTile, t[0], t[1], strMode, fltParam), k) for k, t in dicTodo.items()])
+            for fut in dicFut:
+                strKey = dicFut[fut]
+                strPathLAS, strPathOut, intSize, fltMTime = dicTodo[strKey]
+                try:
+                    intCount = fut.result()
+                except Exception as e:
+                    print('ERROR thinning ' + strPathLAS + ': ' + str(e))
+                    dicManifest.pop(strKey, None)
+                    continue
+                dicManifest[strKey] = {'size': intSize, 'mtime': fltMTime, 'out': strPathOut, 'points': intCount}
+
+        strPathTemp = strPathManifest + '.tmp'
+        with open(strPathTemp, 'w') as txt:
+            json.dump(dicManifest, txt, indent = 1)
+        os.replace(strPathTemp, strPathManifest)
+
+    return [dicManifest[k]['out'] for k in lstKeys if k in dicManifest]
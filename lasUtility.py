@@ -0,0 +1,193 @@
+"""
+---------------------------------------------------------------------------
+ lasUtility.py definitions and classes to read LAS/LAZ headers and points
+   in process, without calling out to FUSION or LAStools.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ LAZ point records require laspy (with lazrs or laszip backend).
+ LAZ headers are uncompressed and are read without it.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import struct
+import numpy as np
+
+try:
+    import laspy
+except ImportError:
+    laspy = None
+
+# default number of points per chunk for ReadPoints
+intDefaultChunk = 2000000
+
+class LASHeader:
+    """ Class LASHeader to obtain LAS/LAZ public header block properties. """
+    def __init__(self, strPathLAS):
+        """ init """
+        strPathLAS = strPathLAS.strip()
+        self.path = strPathLAS
+        self.FType = os.path.splitext(strPathLAS)[1][1:].lower()
+
+        with open(strPathLAS, 'rb') as f:
+            byt = f.read(375)
+        if byt[:4] != b'LASF':
+            raise Exception('Invalid LAS file signature: ' + strPathLAS)
+
+        self.VersionMajor, self.VersionMinor = struct.unpack_from('<BB', byt, 24)
+        self.HeaderSize, self.OffsetPoints, self.NumVLR = struct.unpack_from('<HII', byt, 94)
+        intFormat, self.RecordLength = struct.unpack_from('<BH', byt, 104)
+        # LAZ sets the high bits of the point format
+        self.PointFormat = intFormat & 0x3F
+        self.PointCount = struct.unpack_from('<I', byt, 107)[0]
+        self.PointsByReturn = list(struct.unpack_from('<5I', byt, 111))
+
+        self.XScale, self.YScale, self.ZScale, self.XOffset, self.YOffset, self.ZOffset = struct.unpack_from('<6d', byt, 131)
+        self.XMax, self.XMin, self.YMax, self.YMin, self.ZMax, self.ZMin = struct.unpack_from('<6d', byt, 179)
+
+        # LAS 1.4 64-bit counts supersede the legacy fields
+        if (self.VersionMajor, self.VersionMinor) >= (1, 4) and self.HeaderSize >= 375:
+            intCount = struct.unpack_from('<Q', byt, 247)[0]
+            if intCount:
+                self.PointCount = intCount
+                self.PointsByReturn = list(struct.unpack_from('<15Q', byt, 255))
+
+    def Extent(self):
+        """ Return python list of form [MinX, MinY, MaxX, MaxY] """
+        return [self.XMin, self.YMin, self.XMax, self.YMax]
+
+def ReadHeader(strPathLAS):
+    """ Helper function to return LASHeader object. """
+    return LASHeader(strPathLAS)
+
+def _PointDtype(oH):
+    """ Return numpy dtype of the fields common to all point formats, padded to the record length. """
+    return np.dtype({'names': ['X', 'Y', 'Z', 'intensity', 'return_bits'],
+                     'formats': ['<i4', '<i4', '<i4', '<u2', 'u1'],
+                     'offsets': [0, 4, 8, 12, 14],
+                     'itemsize': oH.RecordLength})
+
+def ReadPoints(strPathLAS, intChunk = None, oH = None):
+    """ Generator ReadPoints
+        args:
+            strPathLAS = input LAS/LAZ file
+            intChunk =   OPTIONAL, points per chunk, default = intDefaultChunk
+            oH =         OPTIONAL, LASHeader of strPathLAS if already read
+
+        yields raw point record arrays of at most intChunk points.
+        Fields X, Y, Z, intensity, return_bits are unscaled, see ScaledXYZ and ReturnNumbers.
+    """
+    if intChunk is None:
+        intChunk = intDefaultChunk
+    if oH is None:
+        oH = LASHeader(strPathLAS)
+    dt = _PointDtype(oH)
+
+    if oH.FType == 'laz':
+        if laspy is None:
+            raise Exception('laspy required to read LAZ points: ' + strPathLAS)
+        with laspy.open(strPathLAS) as rdr:
+            for pts in rdr.chunk_iterator(intChunk):
+                yield np.frombuffer(pts.array.tobytes(), dtype = dt)
+    else:
+        with open(strPathLAS, 'rb') as f:
+            f.seek(oH.OffsetPoints)
+            intLeft = oH.PointCount
+            while intLeft > 0:
+                intN = min(intChunk, intLeft)
+                byt = f.read(intN * oH.RecordLength)
+                intN = len(byt) // oH.RecordLength
+                if not intN:
+                    break
+                yield np.frombuffer(byt, dtype = dt, count = intN)
+                intLeft -= intN
+
+def ScaledXYZ(oH, arrPoints):
+    """ Return x, y, z coordinate arrays of a point chunk in map units. """
+    x = arrPoints['X'] * oH.XScale + oH.XOffset
+    y = arrPoints['Y'] * oH.YScale + oH.YOffset
+    z = arrPoints['Z'] * oH.ZScale + oH.ZOffset
+    return x, y, z
+
+def ReturnNumbers(oH, arrPoints):
+    """ Return return number and number of returns arrays of a point chunk. """
+    bits = arrPoints['return_bits']
+    if oH.PointFormat >= 6:
+        return bits & 0x0F, bits >> 4
+    return bits & 0x07, (bits >> 3) & 0x07
+
+def _VLRs(strPathLAS, oH):
+    """ Return variable length record bytes, without the LASzip compression record. """
+    with open(strPathLAS, 'rb') as f:
+        f.seek(oH.HeaderSize)
+        byt = f.read(oH.OffsetPoints - oH.HeaderSize)
+    lstVLR = []
+    i = 0
+    for n in range(oH.NumVLR):
+        intLen = struct.unpack_from('<H', byt, i + 20)[0]
+        bytVLR = byt[i:i + 54 + intLen]
+        if bytVLR[2:18].rstrip(b'\x00') != b'laszip encoded':
+            lstVLR.append(bytVLR)
+        i += 54 + intLen
+    return lstVLR
+
+def WriteLAS(strPathOut, oH, iterPoints):
+    """ Function WriteLAS
+        args:
+            strPathOut = output uncompressed LAS file
+            oH =         LASHeader of the source, header and VLRs are copied
+            iterPoints = iterable of raw point record arrays, see ReadPoints
+
+        Point counts, returns by number and extent are set from the written points.
+        returns number of points written.
+    """
+    with open(oH.path, 'rb') as f:
+        bytHeader = bytearray(f.read(oH.HeaderSize))
+    lstVLR = _VLRs(oH.path, oH)
+
+    intCount = 0
+    arrByReturn = np.zeros(15, dtype = np.int64)
+    lstMin = [np.inf] * 3
+    lstMax = [-np.inf] * 3
+    with open(strPathOut, 'wb') as f:
+        f.write(bytHeader)
+        for bytVLR in lstVLR:
+            f.write(bytVLR)
+        for arrPoints in iterPoints:
+            if not len(arrPoints):
+                continue
+            f.write(arrPoints.tobytes())
+            intCount += len(arrPoints)
+            arrRet = ReturnNumbers(oH, arrPoints)[0].astype(np.int64)
+            arrByReturn += np.bincount(np.clip(arrRet, 1, 15) - 1, minlength = 15)
+            for i, arr in enumerate(ScaledXYZ(oH, arrPoints)):
+                lstMin[i] = min(lstMin[i], arr.min())
+                lstMax[i] = max(lstMax[i], arr.max())
+    if not intCount:
+        lstMin = lstMax = [0.0] * 3
+
+    struct.pack_into('<II', bytHeader, 96, oH.HeaderSize + sum([len(b) for b in lstVLR]), len(lstVLR))
+    bytHeader[104] = oH.PointFormat
+    # legacy counts are left zero for point formats 6-10
+    if oH.PointFormat < 6 and intCount < 2 ** 32:
+        struct.pack_into('<I', bytHeader, 107, intCount)
+        struct.pack_into('<5I', bytHeader, 111, *[int(n) for n in arrByReturn[:5]])
+    else:
+        struct.pack_into('<6I', bytHeader, 107, *[0] * 6)
+    struct.pack_into('<6d', bytHeader, 179, lstMax[0], lstMin[0], lstMax[1], lstMin[1], lstMax[2], lstMin[2])
+    if oH.HeaderSize >= 235:
+        # waveform and extended VLRs are not copied
+        struct.pack_into('<Q', bytHeader, 227, 0)
+    if oH.HeaderSize >= 375:
+        struct.pack_into('<QI', bytHeader, 235, 0, 0)
+        struct.pack_into('<Q', bytHeader, 247, intCount)
+        struct.pack_into('<15Q', bytHeader, 255, *[int(n) for n in arrByReturn])
+    with open(strPathOut, 'r+b') as f:
+        f.write(bytHeader)
+    return intCount
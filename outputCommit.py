@@ -0,0 +1,188 @@
+"""
+---------------------------------------------------------------------------
+ outputCommit.py definitions and classes to write command outputs to fast
+   local storage first, verify them, then commit them to their LibraryPaths
+   destination (e.g. the N: share) from a background thread pool.
+   A destination file only ever appears complete: it is copied under a
+   temporary name and renamed atomically after verification.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Usage:
+   with OutputCommitter(strPathLocalTemp) as oC:
+       strPathTemp = oC.TempPath(strPathDTM)
+       os.system(pyFusion.CanopyModel(strPathLAS, strPathTemp, 1, oP.UTMcode))
+       oC.Commit(strPathTemp, strPathDTM)
+   or pass (command, points, [(temp, final), ...]) jobs and the committer to
+   commandRunner.RunCommands.
+ Tools writing several files from an output root (e.g. GridMetrics) need
+   each produced file committed.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import struct
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import LiDAR.lasUtility as lasU
+import LiDAR.rasterUtility as rastU
+
+intDefaultThreads = 4
+intHashBlock = 8388608
+
+def _Checksum(strPath):
+    """ Return sha256 hex digest of a file. """
+    h = hashlib.sha256()
+    with open(strPath, 'rb') as f:
+        for byt in iter(lambda: f.read(intHashBlock), b''):
+            h.update(byt)
+    return h.hexdigest()
+
+def VerifyOutput(strPath):
+    """ Function VerifyOutput
+        Raise Exception if strPath is missing, empty, or fails header sanity checks
+        for .dtm, .asc, .las and .laz. Other types are only checked for size.
+    """
+    if not os.path.isfile(strPath):
+        raise Exception('Output missing: ' + strPath)
+    intSize = os.path.getsize(strPath)
+    if not intSize:
+        raise Exception('Output empty: ' + strPath)
+
+    strExt = os.path.splitext(strPath)[1].lower()
+    if strExt == '.dtm':
+        oH = rastU.ReadDTMHeader(strPath)
+        if intSize < rastU.intDTMHeaderSize + oH.DataBytes():
+            raise Exception('Output truncated, ' + str(intSize) + ' bytes, expected '
+                            + str(rastU.intDTMHeaderSize + oH.DataBytes()) + ': ' + strPath)
+    elif strExt == '.asc':
+        with open(strPath) as txt:
+            dic = rastU.ReadASCIIHeader(txt)
+        intHeader = len(dic)
+        intCols, intNRows = int(dic['ncols']), int(dic['nrows'])
+        # all rows present, last row complete
+        intNewlines = 0
+        with open(strPath, 'rb') as f:
+            for byt in iter(lambda: f.read(intHashBlock), b''):
+                intNewlines += byt.count(b'\n')
+            f.seek(max(intSize - 1048576, 0))
+            byt = f.read()
+        bytData = byt.rstrip()
+        intRows = intNewlines - byt[len(bytData):].count(b'\n') + 1 - intHeader
+        if intRows != intNRows:
+            raise Exception('Output truncated, ' + str(intRows) + ' of ' + str(intNRows) + ' rows: ' + strPath)
+        lstLast = bytData.split(b'\n')[-1].split()
+        if len(lstLast) != intCols:
+            raise Exception('Output truncated, last row has ' + str(len(lstLast)) + ' of '
+                            + str(intCols) + ' values: ' + strPath)
+    elif strExt == '.las':
+        oH = lasU.ReadHeader(strPath)
+        intExpected = oH.OffsetPoints + oH.PointCount * oH.RecordLength
+        if intSize < intExpected:
+            raise Exception('Output truncated, ' + str(intSize) + ' bytes, expected at least '
+                            + str(intExpected) + ': ' + strPath)
+    elif strExt == '.laz':
+        # LASzip writes the chunk table last, its offset is the first 8 bytes of the point data,
+        #   -1 if the writer could not seek back, then the offset is in the last 8 bytes
+        oH = lasU.ReadHeader(strPath)
+        if intSize < oH.OffsetPoints + 8:
+            raise Exception('Output truncated, ' + str(intSize) + ' bytes, no chunk table offset: ' + strPath)
+        with open(strPath, 'rb') as f:
+            f.seek(oH.OffsetPoints)
+            intTable = struct.unpack('<q', f.read(8))[0]
+            if intTable == -1:
+                f.seek(intSize - 8)
+                intTable = struct.unpack('<q', f.read(8))[0]
+        if not oH.OffsetPoints < intTable <= intSize - 8:
+            raise Exception('Output truncated, chunk table offset ' + str(intTable) + ' not within '
+                            + str(oH.OffsetPoints) + ' - ' + str(intSize) + ' bytes: ' + strPath)
+
+class OutputCommitter:
+    """ Class OutputCommitter, verify local outputs and commit them to their destination in the background. """
+    def __init__(self, strPathLocal, intThreads = None, boolChecksum = False):
+        """ init """
+        os.makedirs(strPathLocal, exist_ok = True)
+        self.local = strPathLocal
+        self.checksum = boolChecksum
+        self.ex = ThreadPoolExecutor(intThreads or intDefaultThreads)
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def TempPath(self, strPathFinal):
+        """ Return unique local path for an output destined for strPathFinal, extension kept. """
+        with self.lock:
+            self.counter += 1
+            intN = self.counter
+        return os.path.join(self.local, str(os.getpid()) + '_' + str(intN) + '_' + os.path.basename(strPathFinal))
+
+    def _Commit(self, strPathTemp, strPathFinal):
+        """ Verify, copy under a temporary name, check, rename into place, remove local file. """
+        VerifyOutput(strPathTemp)
+        strHash = _Checksum(strPathTemp) if self.checksum else None
+
+        strPathPartial = strPathFinal + '.partial'
+        os.makedirs(os.path.dirname(strPathFinal) or '.', exist_ok = True)
+        try:
+            with open(strPathTemp, 'rb') as fIn, open(strPathPartial, 'wb') as fOut:
+                shutil.copyfileobj(fIn, fOut, intHashBlock)
+                fOut.flush()
+                os.fsync(fOut.fileno())
+            if os.path.getsize(strPathPartial) != os.path.getsize(strPathTemp):
+                raise Exception('Copy size mismatch: ' + strPathFinal)
+            if strHash and _Checksum(strPathPartial) != strHash:
+                raise Exception('Copy checksum mismatch: ' + strPathFinal)
+            os.replace(strPathPartial, strPathFinal)
+        except Exception:
+            if os.path.exists(strPathPartial):
+                os.remove(strPathPartial)
+            raise
+        os.remove(strPathTemp)
+        return strPathFinal
+
+    def Commit(self, strPathTemp, strPathFinal):
+        """ Queue strPathTemp to be verified and committed to strPathFinal, returns future.
+            On failure the local file is kept and the destination is left untouched.
+        """
+        fut = self.ex.submit(self._Commit, strPathTemp, strPathFinal)
+        with self.lock:
+            self.futures.append((fut, strPathTemp, strPathFinal))
+        return fut
+
+    def Discard(self, strPathTemp):
+        """ Remove a local output of a failed command. """
+        if os.path.exists(strPathTemp):
+            os.remove(strPathTemp)
+
+    def Wait(self):
+        """ Wait for queued commits, returns list of (local path, destination, error) that failed. """
+        with self.lock:
+            lstFutures = self.futures
+            self.futures = []
+        lstFailed = []
+        for fut, strPathTemp, strPathFinal in lstFutures:
+            try:
+                fut.result()
+            except Exception as e:
+                print('ERROR committing ' + strPathFinal + ': ' + str(e))
+                lstFailed.append((strPathTemp, strPathFinal, e))
+        return lstFailed
+
+    def close(self):
+        """ Wait for queued commits and stop the uploader threads. """
+        lstFailed = self.Wait()
+        self.ex.shutdown()
+        return lstFailed
@@ -0,0 +1,276 @@
+"""
+---------------------------------------------------------------------------
+ rasterOverviews.py definitions to build and read power of two overview
+   (reduced resolution) levels of large project rasters, e.g. those in
+   pFrastCA, pFrastBE, pFrastINT and pFrastSTS.
+   The base raster is streamed in strips of rows and all levels are computed
+   in one pass with a 2 x 2 decimation cascade. Levels are stored next to the
+   base in the <raster>.pyr folder, one file per level in 256 x 256 cell tiles, so
+   coarse reads touch only a small fraction of the bytes.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Methods: mean (of valid cells), max, nearest (north west cell)
+ Base formats: .dtm, .asc in process, others through arcpy.
+ Level n cell size = base cell size * 2^n, levels are float32, no data = nan.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import json
+import numpy as np
+import LiDAR.rasterUtility as rastU
+
+lstMETHODS = ['mean', 'max', 'nearest']
+lstRASTER_TYPE_OK = ['.dtm', '.asc', '.img', '.tif']
+intTileSize = 256
+intDefaultStripRows = 1024
+strIndexName = 'index.json'
+
+def OverviewDir(strPathBase):
+    """ Return overview directory of a base raster, not .ovr which GDAL and ArcGIS use for their own pyramids. """
+    return strPathBase + '.pyr' + os.sep
+
+def _BaseInfo(strPathBase):
+    """ Return columns, rows, west edge, north edge and cell size of a base raster. """
+    strExt = os.path.splitext(strPathBase)[1].lower()
+    if strExt == '.dtm':
+        oH = rastU.ReadDTMHeader(strPathBase)
+        # .dtm origin is the south west cell center
+        return (oH.Columns, oH.Rows, oH.XMin - oH.ColSpacing / 2.0,
+                oH.YMin + (oH.Rows - 0.5) * oH.RowSpacing, oH.ColSpacing)
+    elif strExt == '.asc':
+        with open(strPathBase) as txt:
+            dic = rastU.ReadASCIIHeader(txt)
+        fltCell = dic['cellsize']
+        fltX = dic.get('xllcorner', dic.get('xllcenter', 0.0) - fltCell / 2.0)
+        fltY = dic.get('yllcorner', dic.get('yllcenter', 0.0) - fltCell / 2.0)
+        return int(dic['ncols']), int(dic['nrows']), fltX, fltY + dic['nrows'] * fltCell, fltCell
+    else:
+        import arcpy
+        ras = arcpy.Raster(strPathBase)
+        return ras.width, ras.height, ras.extent.XMin, ras.extent.YMax, ras.meanCellWidth
+
+def _BaseStrips(strPathBase, intStripRows):
+    """ Generator of row strips of the base raster, first row north, no data = nan. """
+    strExt = os.path.splitext(strPathBase)[1].lower()
+    intCols, intRows, fltX, fltY, fltCell = _BaseInfo(strPathBase)
+    if strExt == '.dtm':
+        arr = rastU.DTMArray(rastU.OpenDTM(strPathBase))
+        for r in range(0, intRows, intStripRows):
+            arrStrip = np.array(arr[r:r + intStripRows], dtype = np.float64)
+            arrStrip[arrStrip == rastU.fltDTMNoData] = np.nan
+            yield arrStrip
+    elif strExt == '.asc':
+        with open(strPathBase) as txt:
+            fltNoData = rastU.ReadASCIIHeader(txt).get('nodata_value')
+            for r in range(0, intRows, intStripRows):
+                intN = min(intStripRows, intRows - r)
+                lstLines = [txt.readline() for i in range(intN)]
+                arrStrip = np.array(' '.join(lstLines).split(), dtype = np.float64).reshape(intN, intCols)
+                if fltNoData is not None:
+                    arrStrip[arrStrip == fltNoData] = np.nan
+                yield arrStrip
+    else:
+        import arcpy
+        for r in range(0, intRows, intStripRows):
+            intN = min(intStripRows, intRows - r)
+            pnt = arcpy.Point(fltX, fltY - (r + intN) * fltCell)
+            yield arcpy.RasterToNumPyArray(strPathBase, pnt, intCols, intN, np.nan).astype(np.float64)
+
+class _Level:
+    """ Class _Level, one overview level being built: pending rows and tiled output. """
+    def __init__(self, strPathBin, intCols, intRows, strMethod):
+        """ init """
+        self.cols = intCols
+        self.rows = intRows
+        self.method = strMethod
+        self.tileRows = -(-intRows // intTileSize)
+        self.tileCols = -(-intCols // intTileSize)
+        self.out = np.lib.format.open_memmap(strPathBin, mode = 'w+', dtype = np.float32,
+                                             shape = (self.tileRows, self.tileCols, intTileSize, intTileSize))
+        self.out[...] = np.nan
+        self.row = 0
+        self.carry = None
+
+    def Write(self, arrA, arrB):
+        """ Write finished rows (state arrays) into the tiled output. """
+        if self.method == 'mean':
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                arr = np.where(arrB > 0, arrA / arrB, np.nan)
+        else:
+            arr = arrA
+        arr = arr[:self.rows - self.row]
+        intN = arr.shape[0]
+        arrPad = np.full((intN, self.tileCols * intTileSize), np.nan, dtype = np.float32)
+        arrPad[:, :arr.shape[1]] = arr
+        arrPad = arrPad.reshape(intN, self.tileCols, intTileSize).transpose(1, 0, 2)
+        i = 0
+        while i < intN:
+            intTR, intOff = divmod(self.row + i, intTileSize)
+            intK = min(intTileSize - intOff, intN - i)
+            self.out[intTR, :, intOff:intOff + intK, :] = arrPad[:, i:i + intK, :]
+            i += intK
+        self.row += intN
+
+def _Reduce(strMethod, arrA, arrB):
+    """ Reduce state arrays (even number of rows) by 2 x 2. """
+    if arrA.shape[1] % 2:
+        arrA = np.concatenate([arrA, np.full((arrA.shape[0], 1), np.nan if strMethod != 'mean' else 0.0)], axis = 1)
+        if arrB is not None:
+            arrB = np.concatenate([arrB, np.zeros((arrB.shape[0], 1))], axis = 1)
+    if strMethod == 'nearest':
+        return arrA[0::2, 0::2], None
+    if strMethod == 'max':
+        arrA = np.fmax(arrA[0::2], arrA[1::2])
+        return np.fmax(arrA[:, 0::2], arrA[:, 1::2]), None
+    arrA = arrA[0::2] + arrA[1::2]
+    arrB = arrB[0::2] + arrB[1::2]
+    return arrA[:, 0::2] + arrA[:, 1::2], arrB[:, 0::2] + arrB[:, 1::2]
+
+def _Cascade(lstLevels, i, arrA, arrB, boolFinal = False):
+    """ Feed rows of the level below into level i and on up the cascade. """
+    if i >= len(lstLevels):
+        return
+    oL = lstLevels[i]
+    if oL.carry is not None:
+        arrA = np.concatenate([oL.carry[0], arrA])
+        if arrB is not None:
+            arrB = np.concatenate([oL.carry[1], arrB])
+        oL.carry = None
+    intN = arrA.shape[0]
+    if intN % 2:
+        if boolFinal:
+            # pad the last odd row with an empty row
+            arrA = np.concatenate([arrA, np.full((1, arrA.shape[1]), np.nan if oL.method != 'mean' else 0.0)])
+            if arrB is not None:
+                arrB = np.concatenate([arrB, np.zeros((1, arrB.shape[1]))])
+        else:
+            oL.carry = (arrA[-1:], None if arrB is None else arrB[-1:])
+            arrA = arrA[:-1]
+            if arrB is not None:
+                arrB = arrB[:-1]
+    if arrA.shape[0]:
+        arrA, arrB = _Reduce(oL.method, arrA, arrB)
+        oL.Write(arrA, arrB)
+    else:
+        arrA = arrA[:0, :(arrA.shape[1] + 1) // 2]
+        arrB = None if arrB is None else arrB[:0, :(arrB.shape[1] + 1) // 2]
+    _Cascade(lstLevels, i + 1, arrA, arrB, boolFinal)
+
+def BuildOverviews(strPathBase, strMethod = 'mean', intLevels = None, intStripRows = None):
+    """ Function BuildOverviews
+        args:
+            strPathBase =  base raster
+            strMethod =    OPTIONAL, mean, max or nearest, default = mean
+            intLevels =    OPTIONAL, number of levels, default = until a level fits one tile
+            intStripRows = OPTIONAL, base rows read at a time, default = intDefaultStripRows
+
+        returns overview directory.
+    """
+    if strMethod not in lstMETHODS:
+        raise Exception('Invalid overview method: ' + strMethod + ', must be in: ' + str(lstMETHODS))
+    if intStripRows is None:
+        intStripRows = intDefaultStripRows
+    intCols, intRows, fltX, fltY, fltCell = _BaseInfo(strPathBase)
+
+    strPathOvr = OverviewDir(strPathBase)
+    os.makedirs(strPathOvr, exist_ok = True)
+    lstLevels = []
+    lstIndex = []
+    intC, intR = intCols, intRows
+    while (intLevels is None and max(intC, intR) > intTileSize) or (intLevels is not None and len(lstLevels) < intLevels):
+        intC, intR = -(-intC // 2), -(-intR // 2)
+        intLevel = len(lstLevels) + 1
+        strName = 'L' + str(intLevel) + '.npy'
+        lstLevels.append(_Level(strPathOvr + strName, intC, intR, strMethod))
+        lstIndex.append({'level': intLevel, 'file': strName, 'cols': intC, 'rows': intR,
+                         'cellsize': fltCell * 2 ** intLevel})
+        if intC == 1 and intR == 1:
+            break
+
+    for arrStrip in _BaseStrips(strPathBase, intStripRows):
+        if strMethod == 'mean':
+            isValid = ~np.isnan(arrStrip)
+            _Cascade(lstLevels, 0, np.where(isValid, arrStrip, 0.0), isValid.astype(np.float64))
+        else:
+            _Cascade(lstLevels, 0, arrStrip, None)
+    _Cascade(lstLevels, 0, np.zeros((0, intCols)), np.zeros((0, intCols)) if strMethod == 'mean' else None, True)
+    for oL in lstLevels:
+        oL.out.flush()
+
+    st = os.stat(strPathBase)
+    dicIndex = {'base': os.path.basename(strPathBase), 'size': st.st_size, 'mtime': st.st_mtime,
+                'method': strMethod, 'xmin': fltX, 'ymax': fltY, 'tile': intTileSize, 'levels': lstIndex}
+    with open(strPathOvr + strIndexName, 'w') as txt:
+        json.dump(dicIndex, txt, indent = 1)
+    return strPathOvr
+
+def ReadOverview(strPathBase, intLevel, lstExt = None):
+    """ Function ReadOverview
+        args:
+            strPathBase = base raster with overviews
+            intLevel =    overview level, 1 = half resolution
+            lstExt =      OPTIONAL, python list of form [MinX, MinY, MaxX, MaxY], default = full extent
+
+        Only the tiles intersecting lstExt are read.
+        returns array (first row north, no data = nan), west edge, north edge, cell size
+    """
+    strPathOvr = OverviewDir(strPathBase)
+    with open(strPathOvr + strIndexName) as txt:
+        dicIndex = json.load(txt)
+    st = os.stat(strPathBase)
+    if [st.st_size, st.st_mtime] != [dicIndex['size'], dicIndex['mtime']]:
+        print('WARNING: overviews older than base raster, rebuild: ' + strPathBase)
+    dicL = dicIndex['levels'][intLevel - 1]
+    fltCell = dicL['cellsize']
+    arrTiles = np.load(strPathOvr + dicL['file'], mmap_mode = 'r')
+
+    intC0, intR0, intC1, intR1 = 0, 0, dicL['cols'], dicL['rows']
+    if lstExt:
+        intC0 = max(int((lstExt[0] - dicIndex['xmin']) // fltCell), 0)
+        intC1 = min(int(-(-(lstExt[2] - dicIndex['xmin']) // fltCell)), dicL['cols'])
+        intR0 = max(int((dicIndex['ymax'] - lstExt[3]) // fltCell), 0)
+        intR1 = min(int(-(-(dicIndex['ymax'] - lstExt[1]) // fltCell)), dicL['rows'])
+    intC1, intR1 = max(intC1, intC0), max(intR1, intR0)
+
+    intTR0, intTR1 = intR0 // intTileSize, -(-intR1 // intTileSize)
+    intTC0, intTC1 = intC0 // intTileSize, -(-intC1 // intTileSize)
+    arr = np.asarray(arrTiles[intTR0:intTR1, intTC0:intTC1]).transpose(0, 2, 1, 3)
+    arr = arr.reshape((intTR1 - intTR0) * intTileSize, (intTC1 - intTC0) * intTileSize)
+    arr = arr[intR0 - intTR0 * intTileSize:intR1 - intTR0 * intTileSize,
+              intC0 - intTC0 * intTileSize:intC1 - intTC0 * intTileSize]
+    return arr, dicIndex['xmin'] + intC0 * fltCell, dicIndex['ymax'] - intR0 * fltCell, fltCell
+
+def BuildProjectOverviews(oP, strMethod = 'mean', lstDirs = None):
+    """ Function BuildProjectOverviews
+        Build overviews for the rasters directly in pFrastCA, pFrastBE, pFrastINT and pFrastSTS
+        (or lstDirs) whose overviews are missing or older than the raster.
+        returns list of rasters processed.
+    """
+    if lstDirs is None:
+        lstDirs = [oP.pFrastCA, oP.pFrastBE, oP.pFrastINT, oP.pFrastSTS]
+    lstDone = []
+    for strPathDir in lstDirs:
+        if not os.path.isdir(strPathDir):
+            continue
+        for strName in sorted(os.listdir(strPathDir)):
+            strPathBase = strPathDir + strName
+            if os.path.splitext(strName)[1].lower() not in lstRASTER_TYPE_OK or not os.path.isfile(strPathBase):
+                continue
+            strPathIndex = OverviewDir(strPathBase) + strIndexName
+            if os.path.exists(strPathIndex):
+                with open(strPathIndex) as txt:
+                    dicIndex = json.load(txt)
+                st = os.stat(strPathBase)
+                if [st.st_size, st.st_mtime, strMethod] == [dicIndex['size'], dicIndex['mtime'], dicIndex['method']]:
+                    continue
+            print('Building overviews: ' + strPathBase)
+            BuildOverviews(strPathBase, strMethod)
+            lstDone.append(strPathBase)
+    return lstDone
@@ -0,0 +1,139 @@
+"""
+---------------------------------------------------------------------------
+ rasterUtility.py definitions to read and write grid formats used by the
+   LiDAR workflow (ESRI ASCII grid, FUSION/PLANS .dtm) as numpy arrays.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Arrays are row major, first row north.
+ FUSION .dtm data are stored by column, south to north; DTMArray returns
+   a row major, first row north view without copying.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import struct
+import numpy as np
+
+fltDefaultNoData = -9999.0
+# ESRI ASCII grid header keys, NODATA_value is optional
+lstASCII_KEYS = ['ncols', 'nrows', 'xllcorner', 'yllcorner', 'xllcenter', 'yllcenter', 'cellsize', 'nodata_value']
+
+# FUSION .dtm
+strDTMSignature = 'PLANS-PC BINARY .DTM'
+intDTMHeaderSize = 200
+fltDTMNoData = -1.0
+dicDTMTypes = {0: '<i2', 1: '<i4', 2: '<f4', 3: '<f8'}
+
+def WriteASCII(strPathASC, arr, fltXMin, fltYMin, fltCellSize, fltNoData = None):
+    """ Function WriteASCII
+        args:
+            strPathASC =  output ESRI ASCII grid
+            arr =         2d numpy array, first row north, nan = no data
+            fltXMin =     west edge of grid
+            fltYMin =     south edge of grid
+            fltCellSize = cell size in map units
+            fltNoData =   OPTIONAL, no data value, default = fltDefaultNoData
+    """
+    if fltNoData is None:
+        fltNoData = fltDefaultNoData
+    arr = np.where(np.isnan(arr), fltNoData, arr)
+    intRows, intCols = arr.shape
+    with open(strPathASC, 'w') as txt:
+        txt.write('ncols ' + str(intCols) + '\n')
+        txt.write('nrows ' + str(intRows) + '\n')
+        txt.write('xllcorner ' + str(fltXMin) + '\n')
+        txt.write('yllcorner ' + str(fltYMin) + '\n')
+        txt.write('cellsize ' + str(fltCellSize) + '\n')
+        txt.write('NODATA_value ' + str(fltNoData) + '\n')
+        np.savetxt(txt, arr, fmt = '%.4f')
+
+def ReadASCIIHeader(txt):
+    """ Function ReadASCIIHeader
+        Read the header lines of an ESRI ASCII grid from open text file txt, leaving txt
+        at the first data row.
+        returns dictionary of lower case key: float value, one per header line.
+    """
+    dicHeader = {}
+    while True:
+        intPos = txt.tell()
+        lst = txt.readline().split()
+        if not lst or lst[0].lower() not in lstASCII_KEYS:
+            txt.seek(intPos)
+            break
+        if len(lst) != 2:
+            raise Exception('Invalid ASCII grid header: ' + txt.name)
+        dicHeader[lst[0].lower()] = float(lst[1])
+    if 'ncols' not in dicHeader or 'nrows' not in dicHeader:
+        raise Exception('Invalid ASCII grid header: ' + txt.name)
+    return dicHeader
+
+def ReadASCII(strPathASC):
+    """ Function ReadASCII
+        returns 2d numpy array (no data = nan) and dictionary of header values.
+    """
+    with open(strPathASC) as txt:
+        dicHeader = ReadASCIIHeader(txt)
+        arr = np.loadtxt(txt, dtype = np.float64, ndmin = 2)
+    if 'nodata_value' in dicHeader:
+        arr[arr == dicHeader['nodata_value']] = np.nan
+    return arr, dicHeader
+
+class DTMHeader:
+    """ Class DTMHeader to obtain FUSION/PLANS .dtm header properties. """
+    def __init__(self, strPathDTM):
+        """ init """
+        self.path = strPathDTM
+        with open(strPathDTM, 'rb') as f:
+            byt = f.read(intDTMHeaderSize)
+        if byt[:len(strDTMSignature)].decode('ascii', 'replace') != strDTMSignature:
+            raise Exception('Invalid DTM file signature: ' + strPathDTM)
+        self.raw = byt
+        self.Version = struct.unpack_from('<f', byt, 82)[0]
+        self.XMin, self.YMin, self.XMax, self.YMax = struct.unpack_from('<4d', byt, 86)
+        self.Columns, self.Rows = struct.unpack_from('<2i', byt, 118)
+        self.ColSpacing, self.RowSpacing, self.ZMin, self.ZMax = struct.unpack_from('<4d', byt, 126)
+        self.XYUnits, self.ZUnits, self.ZType = struct.unpack_from('<3h', byt, 158)
+        self.dtype = np.dtype(dicDTMTypes[self.ZType])
+
+    def DataBytes(self):
+        """ Return expected size of the elevation data. """
+        return self.Columns * self.Rows * self.dtype.itemsize
+
+def ReadDTMHeader(strPathDTM):
+    """ Helper function to return DTMHeader object. """
+    return DTMHeader(strPathDTM)
+
+def OpenDTM(strPathDTM, strMode = 'r', oH = None):
+    """ Return memory mapped .dtm elevations, shape (columns, rows), rows south to north. """
+    if oH is None:
+        oH = DTMHeader(strPathDTM)
+    return np.memmap(strPathDTM, dtype = oH.dtype, mode = strMode, offset = intDTMHeaderSize,
+                     shape = (oH.Columns, oH.Rows))
+
+def DTMArray(arrDTM):
+    """ Return row major, first row north view of (columns, rows) .dtm elevations. """
+    return arrDTM.T[::-1]
+
+def CreateDTM(strPathDTM, oH, intZType = 2):
+    """ Function CreateDTM
+        Create a .dtm with the grid of DTMHeader oH, elevations zero, stored as intZType (default float).
+        returns DTMHeader of the new file.
+    """
+    byt = bytearray(oH.raw)
+    struct.pack_into('<h', byt, 162, intZType)
+    intBytes = oH.Columns * oH.Rows * np.dtype(dicDTMTypes[intZType]).itemsize
+    with open(strPathDTM, 'wb') as f:
+        f.write(byt)
+        f.truncate(intDTMHeaderSize + intBytes)
+    return DTMHeader(strPathDTM)
+
+def SetDTMZRange(strPathDTM, fltZMin, fltZMax):
+    """ Update minimum and maximum elevation in a .dtm header. """
+    with open(strPathDTM, 'r+b') as f:
+        f.seek(142)
+        f.write(struct.pack('<2d', fltZMin, fltZMax))
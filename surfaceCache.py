@@ -0,0 +1,240 @@
+"""
+---------------------------------------------------------------------------
+ surfaceCache.py definitions and classes to share bare earth surfaces
+   (LibraryPaths.GetBEdtm_fromID) between worker processes.
+   The managing process loads each surface once into
+   multiprocessing.shared_memory, bounded in total size with least recently
+   used eviction; workers attach by handle and get read-only numpy views.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Surfaces in use (acquired and not yet released) are never evicted, Submit
+   blocks until the surface of the next job fits beside those in use.
+   Usage, managing process:
+     with BESurfaceCache(oP, 8000) as oCache, ProcessPoolExecutor() as ex:
+         fut = oCache.Submit(ex, fn, strID, ...)
+   worker, fn(dicHandle, ...):
+     arrBE, dicHandle = AttachBE(dicHandle)
+   Jobs run through Submit are detached from their surface when they end,
+   so worker mappings never outlive the cache's own entries.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+import LiDAR.rasterUtility as rastU
+
+intDefaultMaxMB = 8000
+
+class BESurfaceCache:
+    """ Class BESurfaceCache, shared memory LRU cache of bare earth .dtm surfaces by tile ID. """
+    def __init__(self, oP, intMaxMB = None):
+        """ init """
+        if intMaxMB is None:
+            intMaxMB = intDefaultMaxMB
+        self.oP = oP
+        self.maxBytes = intMaxMB * 1048576
+        self.bytes = 0
+        self.cond = threading.Condition()
+        # ID: [SharedMemory, handle, pin count, bytes, loaded event], least recently used first
+        self.entries = OrderedDict()
+        self.counter = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _Load(self, strName, strPathDTM, oH):
+        """ Load surface into a new shared memory segment, return SharedMemory. """
+        shm = shared_memory.SharedMemory(name = strName, create = True, size = max(oH.DataBytes(), 1))
+        try:
+            arr = np.ndarray((oH.Columns, oH.Rows), dtype = oH.dtype, buffer = shm.buf)
+            with open(strPathDTM, 'rb') as f:
+                f.seek(rastU.intDTMHeaderSize)
+                f.readinto(arr)
+            del arr
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        return shm
+
+    def _Evict(self, intBytes):
+        """ Evict least recently used unpinned surfaces until intBytes fits.
+            returns False if it does not fit while other surfaces are in use, caller must wait.
+        """
+        for strID in list(self.entries.keys()):
+            if self.bytes + intBytes <= self.maxBytes:
+                return True
+            shm, dicHandle, intPins, intEntryBytes, evt = self.entries[strID]
+            if intPins:
+                continue
+            self.bytes -= intEntryBytes
+            del self.entries[strID]
+            shm.close()
+            shm.unlink()
+        if self.bytes + intBytes <= self.maxBytes:
+            return True
+        if self.bytes:
+            return False
+        print('WARNING: BE surface larger than cache budget: ' + str(intBytes // 1048576) + ' MB')
+        return True
+
+    def Acquire(self, strID):
+        """ Return shared memory handle of tile strID BE surface, loading it if needed.
+            Blocks while surfaces in use leave no room for it.
+            Surface stays cached until Release is called.
+        """
+        oH = None
+        boolLoad = False
+        with self.cond:
+            while True:
+                if strID in self.entries:
+                    self.entries.move_to_end(strID)
+                    entry = self.entries[strID]
+                    entry[2] += 1
+                    break
+                if oH is None:
+                    # header read without the lock, then recheck
+                    self.cond.release()
+                    try:
+                        strPathDTM = self.oP.GetBEdtm_fromID(strID)
+                        oH = rastU.ReadDTMHeader(strPathDTM)
+                    finally:
+                        self.cond.acquire()
+                    continue
+                if self._Evict(oH.DataBytes()):
+                    # reserve and pin, load below without the lock
+                    self.counter += 1
+                    strName = 'be' + str(os.getpid()) + '_' + str(self.counter)
+                    entry = [None, None, 1, oH.DataBytes(), threading.Event()]
+                    self.entries[strID] = entry
+                    self.bytes += entry[3]
+                    boolLoad = True
+                    break
+                self.cond.wait()
+
+        evt = entry[4]
+        if not boolLoad:
+            # cached, or being loaded by another thread
+            evt.wait()
+            if entry[1] is None:
+                # entry was removed by the failed loader, nothing to release
+                raise Exception('BE surface failed to load: ' + strID)
+            return entry[1]
+
+        try:
+            shm = self._Load(strName, strPathDTM, oH)
+        except Exception:
+            with self.cond:
+                del self.entries[strID]
+                self.bytes -= entry[3]
+                evt.set()
+                self.cond.notify_all()
+            raise
+        entry[0] = shm
+        entry[1] = {'ID': strID,
+                    'name': shm.name,
+                    'shape': (oH.Columns, oH.Rows),
+                    'dtype': oH.dtype.str,
+                    'XMin': oH.XMin,
+                    'YMin': oH.YMin,
+                    'XMax': oH.XMax,
+                    'YMax': oH.YMax,
+                    'ColSpacing': oH.ColSpacing,
+                    'RowSpacing': oH.RowSpacing}
+        evt.set()
+        return entry[1]
+
+    def Release(self, strID):
+        """ Release surface acquired with Acquire. """
+        with self.cond:
+            if strID in self.entries:
+                self.entries[strID][2] -= 1
+            self.cond.notify_all()
+
+    def Submit(self, ex, fn, strID, *args):
+        """ Submit fn(handle, *args) to executor ex, releasing the surface when done.
+            Blocks while the surfaces of queued and running jobs fill the cache, so
+            submissions are paced by the budget.
+        """
+        dicHandle = self.Acquire(strID)
+        try:
+            fut = ex.submit(_RunAttached, fn, dicHandle, *args)
+        except Exception:
+            self.Release(strID)
+            raise
+        fut.add_done_callback(lambda f: self.Release(strID))
+        return fut
+
+    def close(self):
+        """ Unlink all shared memory segments. """
+        with self.cond:
+            for shm, dicHandle, intPins, intBytes, evt in self.entries.values():
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            self.entries.clear()
+            self.bytes = 0
+
+# worker side, name: [SharedMemory, array]
+_dicAttached = {}
+
+def _AttachShared(strName):
+    """ Attach existing segment without handing its lifetime to this process. """
+    try:
+        return shared_memory.SharedMemory(name = strName, track = False)
+    except TypeError:
+        # python < 3.13, attaching registers the segment with the resource tracker.
+        #   Workers started by multiprocessing share the managing process's tracker, which already
+        #   holds the registration and must keep it; only a tracker of this process's own would
+        #   unlink the segment at exit
+        boolOwnTracker = os.name == 'posix' and resource_tracker._resource_tracker._fd is None
+        shm = shared_memory.SharedMemory(name = strName)
+        if boolOwnTracker:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+def _RunAttached(fn, dicHandle, *args):
+    """ Run fn(dicHandle, *args) in a worker, detaching the surface when it ends. """
+    try:
+        return fn(dicHandle, *args)
+    finally:
+        DetachBE(dicHandle)
+
+def AttachBE(dicHandle):
+    """ Function AttachBE
+        Return read-only row major, first row north view of a cached BE surface and its handle.
+        Handle keys: ID, XMin, YMin, XMax, YMax, ColSpacing, RowSpacing, see BESurfaceCache.
+        No data = rasterUtility.fltDTMNoData.
+    """
+    strName = dicHandle['name']
+    if strName not in _dicAttached:
+        shm = _AttachShared(strName)
+        arr = np.ndarray(dicHandle['shape'], dtype = np.dtype(dicHandle['dtype']), buffer = shm.buf)
+        arr.flags.writeable = False
+        _dicAttached[strName] = [shm, arr]
+    return rastU.DTMArray(_dicAttached[strName][1]), dicHandle
+
+def DetachBE(dicHandle):
+    """ Detach a surface attached with AttachBE; views obtained from it must not be used after. """
+    lst = _dicAttached.pop(dicHandle['name'], None)
+    if lst is None:
+        return
+    shm, arr = lst
+    del lst, arr
+    try:
+        shm.close()
+    except BufferError:
+        # caller still holds a view, mapping is released with it
+        pass
@@ -0,0 +1,185 @@
+"""
+---------------------------------------------------------------------------
+ surfaceDerivatives.py definitions to compute moving window derivatives of
+   a canopy or bare earth .dtm in process, replacing one GridSurfaceStats call
+   per statistic. The surface is read in overlapping blocks of columns (halo),
+   all requested statistics are computed per block with vectorized sliding
+   window operations and written to one .dtm per statistic in pFrastCAd.
+   Blocks are distributed across a process pool.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Statistics (window is intWindow x intWindow cells, output on the input grid):
+   mean, std, min, max, range
+   slope =     mean slope in degrees
+   rugosity =  mean ratio of surface area to planimetric area
+ Input and output no data = rasterUtility.fltDTMNoData
+ Block width is sized from a per worker memory budget and the grid height.
+
+ Known limitations: python 3
+   callers on Windows must run SurfaceDerivatives under if __name__ == '__main__':
+   no GridSurfaceStats sample factor, outputs are always on the input grid
+     (a coarser output needs a separate resample or GridSurfaceStats)
+---------------------------------------------------------------------------
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import LiDAR.rasterUtility as rastU
+
+lstSTATS = ['mean', 'std', 'min', 'max', 'range', 'slope', 'rugosity']
+# per worker memory budget for one block, MB
+intDefaultBlockMB = 512
+# float64 arrays of block size alive at peak, all statistics
+intBlockArrays = 24
+
+def _BoxSum(arr, intWin):
+    """ Return moving window sums of arr, shape reduced by intWin - 1 on both axes. """
+    arrC = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1))
+    np.cumsum(np.cumsum(arr, axis = 0), axis = 1, out = arrC[1:, 1:])
+    return arrC[intWin:, intWin:] - arrC[:-intWin, intWin:] - arrC[intWin:, :-intWin] + arrC[:-intWin, :-intWin]
+
+def _BoxReduce(ufunc, arr, intWin):
+    """ Return moving window reduction (separable, e.g. np.fmax) of arr, shape reduced by intWin - 1. """
+    arr = ufunc.reduce(sliding_window_view(arr, intWin, axis = 1), axis = -1)
+    return ufunc.reduce(sliding_window_view(arr, intWin, axis = 0), axis = -1)
+
+def _BlockStats(arr, lstStats, intWin, fltColSpacing, fltRowSpacing):
+    """ Return dictionary of stat: array for block arr (nan = no data), padded by intWin // 2 + 1. """
+    intPad = intWin // 2 + 1
+    isValid = ~np.isnan(arr)
+    # centered on the block mean to keep moving sums of squares precise
+    fltRef = float(np.nanmean(arr)) if isValid.any() else 0.0
+    arrZero = np.where(isValid, arr - fltRef, 0.0)
+    dicOut = {}
+
+    # trim the extra cell only needed for gradients
+    arrW = arr[1:-1, 1:-1]
+    arrN = _BoxSum(isValid[1:-1, 1:-1].astype(np.float64), intWin)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        if set(['mean', 'std']) & set(lstStats):
+            arrMean = _BoxSum(arrZero[1:-1, 1:-1], intWin) / arrN
+            if 'mean' in lstStats:
+                dicOut['mean'] = arrMean + fltRef
+            if 'std' in lstStats:
+                arrSS = _BoxSum(arrZero[1:-1, 1:-1] ** 2, intWin) / arrN
+                dicOut['std'] = np.sqrt(np.maximum(arrSS - arrMean ** 2, 0.0))
+        if set(['min', 'range']) & set(lstStats):
+            arrMin = _BoxReduce(np.fmin, arrW, intWin)
+            dicOut['min'] = arrMin
+        if set(['max', 'range']) & set(lstStats):
+            arrMax = _BoxReduce(np.fmax, arrW, intWin)
+            dicOut['max'] = arrMax
+        if 'range' in lstStats:
+            dicOut['range'] = arrMax - arrMin
+
+        if set(['slope', 'rugosity']) & set(lstStats):
+            dzdx, dzdy = np.gradient(arr, fltColSpacing, fltRowSpacing)
+            arrG = (dzdx ** 2 + dzdy ** 2)[1:-1, 1:-1]
+            isG = ~np.isnan(arrG)
+            arrNG = _BoxSum(isG.astype(np.float64), intWin)
+            if 'slope' in lstStats:
+                arrSlope = np.degrees(np.arctan(np.sqrt(np.where(isG, arrG, 0.0))))
+                dicOut['slope'] = _BoxSum(arrSlope, intWin) / arrNG
+            if 'rugosity' in lstStats:
+                arrArea = np.sqrt(1.0 + np.where(isG, arrG, 0.0))
+                dicOut['rugosity'] = _BoxSum(arrArea, intWin) / arrNG
+
+    # no data where center cell is no data
+    isCenter = isValid[intPad:-intPad, intPad:-intPad]
+    for k in dicOut:
+        dicOut[k] = np.where(isCenter & ~np.isnan(dicOut[k]), dicOut[k], np.nan)
+    return dicOut
+
+def DerivativeBlock(strPathDTM, dicPathOut, intCol0, intCol1, intWin):
+    """ Function DerivativeBlock
+        Compute statistics for columns intCol0:intCol1 of strPathDTM and write them
+        into the output .dtm files of dicPathOut (stat: path).
+        returns dictionary of stat: (min, max) of written values.
+    """
+    oH = rastU.ReadDTMHeader(strPathDTM)
+    arrIn = rastU.OpenDTM(strPathDTM, oH = oH)
+    intPad = intWin // 2 + 1
+
+    # halo columns from neighbors, nan beyond the grid edge
+    intA = max(intCol0 - intPad, 0)
+    intB = min(intCol1 + intPad, oH.Columns)
+    arr = np.full((intCol1 - intCol0 + 2 * intPad, oH.Rows + 2 * intPad), np.nan)
+    arrBlock = np.asarray(arrIn[intA:intB], dtype = np.float64)
+    arrBlock[arrBlock == rastU.fltDTMNoData] = np.nan
+    arr[intA - intCol0 + intPad:intB - intCol0 + intPad, intPad:-intPad] = arrBlock
+    del arrIn, arrBlock
+
+    # .dtm storage axes are (x, y)
+    dicStats = _BlockStats(arr, list(dicPathOut.keys()), intWin, oH.ColSpacing, oH.RowSpacing)
+
+    dicRange = {}
+    for strStat, strPathOut in dicPathOut.items():
+        arrStat = dicStats[strStat]
+        isData = ~np.isnan(arrStat)
+        if isData.any():
+            dicRange[strStat] = (float(arrStat[isData].min()), float(arrStat[isData].max()))
+        arrOut = rastU.OpenDTM(strPathOut, 'r+')
+        arrOut[intCol0:intCol1] = np.where(isData, arrStat, rastU.fltDTMNoData)
+        arrOut.flush()
+        del arrOut
+    return dicRange
+
+def BlockColumns(oH, intWindow, intBlockMB = None):
+    """ Return columns per block so one block's working arrays fit intBlockMB (default intDefaultBlockMB). """
+    if intBlockMB is None:
+        intBlockMB = intDefaultBlockMB
+    intPad = intWindow // 2 + 1
+    intColBytes = intBlockArrays * 8 * (oH.Rows + 2 * intPad)
+    return max(int(intBlockMB * 1048576 // intColBytes) - 2 * intPad, 1)
+
+def SurfaceDerivatives(strPathDTM, lstStats, intWindow, strPathOutDir, intBlockCols = None, intWorkers = None,
+                       intBlockMB = None):
+    """ Function SurfaceDerivatives
+        args:
+            strPathDTM =    input canopy or bare earth .dtm
+            lstStats =      list of statistics, see lstSTATS
+            intWindow =     window width in cells, odd
+            strPathOutDir = output directory, e.g. LibraryPaths.pFrastCAd
+            intBlockCols =  OPTIONAL, columns per block, default = sized from intBlockMB, see BlockColumns
+            intWorkers =    OPTIONAL, number of processes, default = cpu count
+            intBlockMB =    OPTIONAL, memory budget per worker, MB, default = intDefaultBlockMB
+
+        Outputs are named <input name>_<stat><window>.dtm
+        returns dictionary of stat: output path.
+    """
+    for strStat in lstStats:
+        if strStat not in lstSTATS:
+            raise Exception('Invalid statistic: ' + strStat + ', must be in: ' + str(lstSTATS))
+    if intWindow < 1 or not intWindow % 2:
+        raise Exception('Window must be a positive odd number of cells: ' + str(intWindow))
+
+    oH = rastU.ReadDTMHeader(strPathDTM)
+    if intBlockCols is None:
+        intBlockCols = BlockColumns(oH, intWindow, intBlockMB)
+    strBase = os.path.splitext(os.path.basename(strPathDTM))[0]
+    dicPathOut = {}
+    for strStat in lstStats:
+        strPathOut = os.path.join(strPathOutDir, strBase + '_' + strStat + str(intWindow) + '.dtm')
+        rastU.CreateDTM(strPathOut, oH)
+        dicPathOut[strStat] = strPathOut
+
+    dicRange = {}
+    with ProcessPoolExecutor(intWorkers) as ex:
+        lstFut = [ex.submit(DerivativeBlock, strPathDTM, dicPathOut, i, min(i + intBlockCols, oH.Columns), intWindow)
+                  for i in range(0, oH.Columns, intBlockCols)]
+        for fut in lstFut:
+            for strStat, (fltMin, fltMax) in fut.result().items():
+                if strStat in dicRange:
+                    fltMin = min(fltMin, dicRange[strStat][0])
+                    fltMax = max(fltMax, dicRange[strStat][1])
+                dicRange[strStat] = (fltMin, fltMax)
+
+    for strStat, strPathOut in dicPathOut.items():
+        rastU.SetDTMZRange(strPathOut, *dicRange.get(strStat, (0.0, 0.0)))
+    return dicPathOut
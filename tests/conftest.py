@@ -0,0 +1,16 @@
+"""
+ pytest configuration: modules import each other as LiDAR.<module>, register the
+   repository root as the LiDAR package when it is not installed under that name.
+"""
+import os
+import sys
+import importlib.util
+
+strPathRepo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'LiDAR' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('LiDAR', os.path.join(strPathRepo, '__init__.py'),
+                                                  submodule_search_locations = [strPathRepo])
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules['LiDAR'] = mod
+    spec.loader.exec_module(mod)
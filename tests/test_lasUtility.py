@@ -0,0 +1,62 @@
+"""
+ tests of lasUtility header, VLR and point round trip through WriteLAS.
+"""
+import struct
+import numpy as np
+import LiDAR.lasUtility as lasU
+
+def _VLR(strUser, intRecord, byt):
+    """ Return one VLR: 54 byte header and payload. """
+    return (struct.pack('<H16sHH32s', 0, strUser.encode(), intRecord, len(byt), b'test')) + byt
+
+def _WriteSynthetic(strPathLAS, lstVLR, intPoints = 100):
+    """ Write a LAS 1.2 point format 1 file with lstVLR, return its raw point bytes. """
+    rng = np.random.default_rng(0)
+    intRecord = 28
+    dt = np.dtype({'names': ['X', 'Y', 'Z', 'return_bits'],
+                   'formats': ['<i4', '<i4', '<i4', 'u1'],
+                   'offsets': [0, 4, 8, 14],
+                   'itemsize': intRecord})
+    arr = np.zeros(intPoints, dtype = dt)
+    arr['X'] = rng.integers(0, 100000, intPoints)
+    arr['Y'] = rng.integers(0, 100000, intPoints)
+    arr['Z'] = rng.integers(0, 10000, intPoints)
+    arr['return_bits'] = 1 | (1 << 3)
+    intOffset = 227 + sum([len(b) for b in lstVLR])
+
+    byt = bytearray(227)
+    byt[0:4] = b'LASF'
+    byt[24:26] = b'\x01\x02'
+    struct.pack_into('<HII', byt, 94, 227, intOffset, len(lstVLR))
+    struct.pack_into('<BHI', byt, 104, 1, intRecord, intPoints)
+    struct.pack_into('<6d', byt, 131, 0.01, 0.01, 0.01, 0.0, 0.0, 0.0)
+    with open(strPathLAS, 'wb') as f:
+        f.write(byt)
+        for bytVLR in lstVLR:
+            f.write(bytVLR)
+        f.write(arr.tobytes())
+    return arr.tobytes()
+
+def test_WriteLAS_round_trip(tmp_path):
+    bytGeoKeys = struct.pack('<25H', *range(25))
+    lstVLR = [_VLR('LASF_Projection', 34735, bytGeoKeys),
+              _VLR('laszip encoded', 22204, b'\x01' * 34),
+              _VLR('LASF_Projection', 2112, b'PROJCS["test"]\x00')]
+    strPathIn = str(tmp_path / 'in.las')
+    strPathOut = str(tmp_path / 'out.las')
+    bytPoints = _WriteSynthetic(strPathIn, lstVLR)
+
+    oH = lasU.ReadHeader(strPathIn)
+    assert lasU._VLRs(strPathIn, oH) == [lstVLR[0], lstVLR[2]]
+
+    intCount = lasU.WriteLAS(strPathOut, oH, lasU.ReadPoints(strPathIn, intChunk = 30, oH = oH))
+    oH2 = lasU.ReadHeader(strPathOut)
+    assert intCount == oH2.PointCount == 100
+    assert oH2.NumVLR == 2
+    assert lasU._VLRs(strPathOut, oH2) == [lstVLR[0], lstVLR[2]]
+    assert oH2.OffsetPoints == 227 + len(lstVLR[0]) + len(lstVLR[2])
+    assert b''.join([a.tobytes() for a in lasU.ReadPoints(strPathOut, oH = oH2)]) == bytPoints
+    assert oH2.PointsByReturn[0] == 100
+
+    x, y, z = lasU.ScaledXYZ(oH2, np.frombuffer(bytPoints, dtype = lasU._PointDtype(oH2)))
+    assert oH2.Extent() == [x.min(), y.min(), x.max(), y.max()]
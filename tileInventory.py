@@ -0,0 +1,193 @@
+"""
+---------------------------------------------------------------------------
+ tileInventory.py definitions and classes to keep a persistent per project
+   inventory of LAS/LAZ tiles in SQLite, refreshed incrementally.
+   Records size, modification time and header point count and extents,
+   reports tiles added, removed and modified since the last scan and
+   regenerates the LasList/TiledLasList text files.
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import os
+import time
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from LiDAR.LiDARLib3 import lstFILE_TYPE_OK
+import LiDAR.lasUtility as lasU
+
+intDefaultThreads = 8
+
+strCreateSQL = """CREATE TABLE IF NOT EXISTS tiles (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime REAL,
+                    points INTEGER,
+                    xmin REAL, ymin REAL, xmax REAL, ymax REAL,
+                    scanned REAL)"""
+
+def InventoryPath(oP):
+    """ Return project inventory database. """
+    return oP.pRpnts + oP.Sub + '_inventory.sqlite'
+
+def _ScanDir(strPathDir, lstOK):
+    """ Return dictionary of path: (size, mtime) of LAS/LAZ files under strPathDir, recursive. """
+    dicFiles = {}
+    lstDirs = [strPathDir]
+    while lstDirs:
+        with os.scandir(lstDirs.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks = False):
+                    lstDirs.append(entry.path)
+                elif entry.name[-3:].lower() in lstOK:
+                    st = entry.stat()
+                    dicFiles[entry.path] = (st.st_size, st.st_mtime)
+    return dicFiles
+
+def _HeaderRow(strPathLAS):
+    """ Return (points, xmin, ymin, xmax, ymax) from header, None values if unreadable. """
+    try:
+        oH = lasU.ReadHeader(strPathLAS)
+    except Exception as e:
+        print('WARNING: unreadable header ' + strPathLAS + ': ' + str(e))
+        return (None, None, None, None, None)
+    return tuple([oH.PointCount] + oH.Extent())
+
+class TileInventory:
+    """ Class TileInventory, SQLite inventory of LAS/LAZ tiles. """
+    def __init__(self, strPathDB, lstOK = None):
+        """ init """
+        if lstOK is None:
+            lstOK = lstFILE_TYPE_OK
+        self.path = strPathDB
+        self.lstOK = lstOK
+        self.con = sqlite3.connect(strPathDB)
+        self.con.execute(strCreateSQL)
+        self.con.commit()
+
+    def close(self):
+        """ Close database. """
+        self.con.close()
+
+    def _Root(self, strPathRoot):
+        """ Return normalized root with trailing separator. """
+        return os.path.normpath(strPathRoot) + os.sep
+
+    def Scan(self, strPathRoot, boolParallel = True, intThreads = None):
+        """ Return dictionary of path: (size, mtime) of files under strPathRoot.
+            Subdirectories of strPathRoot are scanned in parallel threads.
+        """
+        strPathRoot = self._Root(strPathRoot)
+        dicFiles = {}
+        lstSub = []
+        with os.scandir(strPathRoot) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks = False):
+                    lstSub.append(entry.path)
+                elif entry.name[-3:].lower() in self.lstOK:
+                    st = entry.stat()
+                    dicFiles[entry.path] = (st.st_size, st.st_mtime)
+
+        if boolParallel and len(lstSub) > 1:
+            with ThreadPoolExecutor(intThreads or intDefaultThreads) as ex:
+                for dic in ex.map(lambda s: _ScanDir(s, self.lstOK), lstSub):
+                    dicFiles.update(dic)
+        else:
+            for strPathSub in lstSub:
+                dicFiles.update(_ScanDir(strPathSub, self.lstOK))
+        return dicFiles
+
+    def Refresh(self, strPathRoot, boolParallel = True, intThreads = None):
+        """ Function Refresh
+            args:
+                strPathRoot =  directory to scan, recursive
+                boolParallel = OPTIONAL, scan subdirectories and read headers in parallel, default = True
+                intThreads =   OPTIONAL, threads, default = intDefaultThreads
+
+            Headers are read only for added and modified tiles.
+            returns dictionary of sorted path lists: added, removed, modified
+        """
+        strPathRoot = self._Root(strPathRoot)
+        dicFiles = self.Scan(strPathRoot, boolParallel, intThreads)
+
+        dicOld = {}
+        for strPath, intSize, fltMTime in self.con.execute(
+                'SELECT path, size, mtime FROM tiles WHERE substr(path, 1, ?) = ?',
+                (len(strPathRoot), strPathRoot)):
+            dicOld[strPath] = (intSize, fltMTime)
+
+        lstAdded = sorted([s for s in dicFiles if s not in dicOld])
+        lstRemoved = sorted([s for s in dicOld if s not in dicFiles])
+        lstModified = sorted([s for s in dicFiles if s in dicOld and tuple(dicOld[s]) != dicFiles[s]])
+
+        lstRead = lstAdded + lstModified
+        if boolParallel and len(lstRead) > 1:
+            with ThreadPoolExecutor(intThreads or intDefaultThreads) as ex:
+                lstHeader = list(ex.map(_HeaderRow, lstRead))
+        else:
+            lstHeader = [_HeaderRow(s) for s in lstRead]
+
+        fltNow = time.time()
+        with self.con:
+            self.con.executemany('DELETE FROM tiles WHERE path = ?', [(s,) for s in lstRemoved])
+            self.con.executemany('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                 [(s,) + dicFiles[s] + tupH + (fltNow,) for s, tupH in zip(lstRead, lstHeader)])
+
+        print('{0}: {1} tile(s), {2} added, {3} removed, {4} modified'.format(
+            strPathRoot, len(dicFiles), len(lstAdded), len(lstRemoved), len(lstModified)))
+        return {'added': lstAdded, 'removed': lstRemoved, 'modified': lstModified}
+
+    def Paths(self, strPathRoot = None):
+        """ Return sorted list of inventoried tiles, optionally only those under strPathRoot. """
+        if strPathRoot is None:
+            cur = self.con.execute('SELECT path FROM tiles ORDER BY path')
+        else:
+            strPathRoot = self._Root(strPathRoot)
+            cur = self.con.execute('SELECT path FROM tiles WHERE substr(path, 1, ?) = ? ORDER BY path',
+                                   (len(strPathRoot), strPathRoot))
+        return [row[0] for row in cur]
+
+    def Tiles(self, strPathRoot = None):
+        """ Return dictionary of path: (points, xmin, ymin, xmax, ymax). """
+        strSQL = 'SELECT path, points, xmin, ymin, xmax, ymax FROM tiles'
+        if strPathRoot is None:
+            cur = self.con.execute(strSQL)
+        else:
+            strPathRoot = self._Root(strPathRoot)
+            cur = self.con.execute(strSQL + ' WHERE substr(path, 1, ?) = ?', (len(strPathRoot), strPathRoot))
+        return dict([(row[0], row[1:]) for row in cur])
+
+    def WriteList(self, strPathList, strPathRoot):
+        """ Write text list of tiles under strPathRoot, one path per line, see LiDARUtility.GetLASlist. """
+        with open(strPathList, 'w') as txt:
+            for strPath in self.Paths(strPathRoot):
+                txt.write(strPath + '\n')
+
+def RefreshProject(oP, boolParallel = True, intThreads = None):
+    """ Function RefreshProject
+        Refresh project inventory of full cloud and tiled points and regenerate
+        LasList and TiledLasList.
+        returns dictionary of path: Refresh result for each scanned directory.
+    """
+    if oP.FType == 'las':
+        strPathTiled = oP.pRpntsTLAS
+    else:
+        strPathTiled = oP.pRpntsTLAZ
+
+    oInv = TileInventory(InventoryPath(oP), [oP.FType])
+    dicChanges = {}
+    try:
+        for strPathDir, strPathList in [(oP.pRpntsLAS, oP.LasList), (strPathTiled, oP.TiledLasList)]:
+            if not os.path.isdir(strPathDir):
+                continue
+            dicChanges[strPathDir] = oInv.Refresh(strPathDir, boolParallel, intThreads)
+            oInv.WriteList(strPathList, strPathDir)
+    finally:
+        oInv.close()
+    return dicChanges
@@ -0,0 +1,158 @@
+"""
+---------------------------------------------------------------------------
+ treeMerge.py definitions to merge per tile tree lists (CanopyMaxima, TreeSeg)
+   into one project tree list, removing trees reported more than once
+   because tiles are processed with a buffer (intTileBuffer).
+ 10/2026
+
+ Kirk Evans, GIS Analyst/Programmer, TetraTech EC @ USDA Forest Service R5/Remote Sensing Lab
+   3237 Peacekeeper Way, Suite 201
+   McClellan, CA 95652
+   kdevans@fs.fed.us
+
+ Each tree is owned by the tile whose unbuffered extent (TileObj) contains it.
+ Trees from neighboring tiles closer than a tolerance across a seam are
+ treated as the same tree, the taller is kept.
+ Tiles are streamed one tile row at a time, only trees near a row's top
+ seam are carried over to the next row, so memory is bounded by the largest row.
+
+ this version for python 3.x
+---------------------------------------------------------------------------
+"""
+import math
+import numpy as np
+
+# defaults, columns as written by CanopyMaxima: ID, X, Y, elevation, height...
+fltDefaultTolerance = 1.5
+intDefaultColX = 1
+intDefaultColY = 2
+intDefaultColHt = 4
+
+def _ReadTrees(strPathCSV, intColX, intColY, intColHt):
+    """ Return header line, list of tree lines and x, y, height arrays. """
+    with open(strPathCSV) as txt:
+        lstLines = txt.readlines()
+    if not lstLines:
+        return None, [], np.zeros(0), np.zeros(0), np.zeros(0)
+    strHeader = lstLines[0]
+    lstLines = [l for l in lstLines[1:] if l.strip()]
+    lstSplit = [l.split(',') for l in lstLines]
+    x = np.array([float(s[intColX]) for s in lstSplit])
+    y = np.array([float(s[intColY]) for s in lstSplit])
+    h = np.array([float(s[intColHt]) for s in lstSplit])
+    return strHeader, lstLines, x, y, h
+
+class SeamHash:
+    """ Class SeamHash, spatial hash of accepted trees near tile seams. """
+    def __init__(self, fltTolerance):
+        """ init """
+        self.tol = fltTolerance
+        self.tol2 = fltTolerance * fltTolerance
+        self.cells = {}
+
+    def _key(self, x, y):
+        """ Return hash cell of a coordinate. """
+        return math.floor(x / self.tol), math.floor(y / self.tol)
+
+    def Add(self, x, y, strTile):
+        """ Add accepted tree. """
+        self.cells.setdefault(self._key(x, y), []).append((x, y, strTile))
+
+    def HasDuplicate(self, x, y, strTile):
+        """ Return True if an accepted tree from another tile is within tolerance. """
+        i, j = self._key(x, y)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for x2, y2, strTile2 in self.cells.get((i + di, j + dj), ()):
+                    if strTile2 != strTile and (x - x2) ** 2 + (y - y2) ** 2 <= self.tol2:
+                        return True
+        return False
+
+def MergeTrees(oP, lstPathCSV, strPathOutCSV = None, fltTolerance = None,
+               intColX = None, intColY = None, intColHt = None):
+    """ Function MergeTrees
+        args:
+            oP =            LibraryPaths object
+            lstPathCSV =    list of per tile tree csv files, named so TileObj can parse the tile ID
+            strPathOutCSV = OPTIONAL, output project tree csv, default = pFvectTAO + <project>_trees.csv
+            fltTolerance =  OPTIONAL, seam duplicate distance in map units, default = fltDefaultTolerance
+            intColX, intColY, intColHt = OPTIONAL, csv columns of x, y and height, default CanopyMaxima layout
+
+        returns number of trees written.
+    """
+    if strPathOutCSV is None:
+        strPathOutCSV = oP.pFvectTAO + oP.name + '_trees.csv'
+    if fltTolerance is None:
+        fltTolerance = fltDefaultTolerance
+    if intColX is None:
+        intColX = intDefaultColX
+    if intColY is None:
+        intColY = intDefaultColY
+    if intColHt is None:
+        intColHt = intDefaultColHt
+
+    # group tiles into rows, south to north
+    dicRows = {}
+    for strPathCSV in lstPathCSV:
+        oT = oP.getTileObject(strPathCSV)
+        dicRows.setdefault(oT.bottom, []).append(oT)
+
+    intIn = 0
+    intOut = 0
+    strHeaderOut = None
+    lstCarry = []
+    intCarryTop = None
+    with open(strPathOutCSV, 'w') as txtOut:
+        for intBottom in sorted(dicRows.keys()):
+            lstTiles = sorted(dicRows[intBottom], key = lambda oT: oT.left)
+            # trees accepted in the row below near the shared seam are not yet written,
+            #   they compete again with this row's seam trees
+            lstCandidates = []
+            for t in lstCarry:
+                if intCarryTop == intBottom:
+                    lstCandidates.append(t)
+                else:
+                    txtOut.write(t[4])
+                    intOut += 1
+            lstCarry = []
+            intCarryTop = max([oT.top for oT in lstTiles])
+
+            for oT in lstTiles:
+                strHeader, lstLines, x, y, h = _ReadTrees(oT.path, intColX, intColY, intColHt)
+                intIn += len(lstLines)
+                if strHeader is None:
+                    continue
+                if strHeaderOut is None:
+                    strHeaderOut = strHeader
+                    txtOut.write(strHeaderOut)
+
+                # ownership by unbuffered tile extent
+                isOwn = (x >= oT.left) & (x < oT.right) & (y >= oT.bottom) & (y < oT.top)
+                isSeam = isOwn & ((x < oT.left + fltTolerance) | (x >= oT.right - fltTolerance) |
+                                  (y < oT.bottom + fltTolerance) | (y >= oT.top - fltTolerance))
+                for i in np.flatnonzero(isOwn & ~isSeam):
+                    txtOut.write(lstLines[i])
+                    intOut += 1
+                for i in np.flatnonzero(isSeam):
+                    lstCandidates.append((h[i], x[i], y[i], oT.ID, lstLines[i], oT.top))
+
+            # taller tree wins within tolerance across a seam
+            oHash = SeamHash(fltTolerance)
+            lstCandidates.sort(key = lambda t: -t[0])
+            for t in lstCandidates:
+                fltH, x, y, strTile, strLine, intTop = t
+                if oHash.HasDuplicate(x, y, strTile):
+                    continue
+                oHash.Add(x, y, strTile)
+                if intTop == intCarryTop and y >= intTop - fltTolerance:
+                    lstCarry.append(t)
+                else:
+                    txtOut.write(strLine)
+                    intOut += 1
+
+        for t in lstCarry:
+            txtOut.write(t[4])
+            intOut += 1
+
+    print(str(intIn) + ' tree(s) read, ' + str(intOut) + ' tree(s) written to ' + strPathOutCSV)
+    return intOut